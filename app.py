@@ -2,11 +2,48 @@
 import streamlit as st
 import socket
 import json
+import struct
+import logging
+import os
+import selectors
 import threading
 import time
 import queue
+from collections import deque
+from functools import lru_cache
 
-BUFFER_SIZE = 4096
+try:
+    import orjson
+    _dumps = orjson.dumps  # returns UTF-8 bytes directly
+    _loads = orjson.loads  # parses UTF-8 bytes directly
+except ImportError:
+    orjson = None
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+try:
+    from streamlit_autorefresh import st_autorefresh
+except ImportError:
+    st_autorefresh = None
+
+# Debug tracing is off unless QUIZ_DEBUG=1; disabled log.debug calls skip formatting
+log = logging.getLogger(__name__)
+if os.environ.get("QUIZ_DEBUG") == "1":
+    logging.basicConfig(format="[DEBUG] %(message)s")
+    log.setLevel(logging.DEBUG)
+
+BUFFER_SIZE = 65536  # receive buffer, allocated once per receiver thread
+# Wire format: each message is a 4-byte big-endian length followed by a JSON body
+_HEADER = struct.Struct('>I')  # compiled once; used for every frame
+_pack_header = _HEADER.pack
+_unpack_header = _HEADER.unpack_from
+POLL_INTERVAL_MS = 500  # how often the UI re-runs to pick up server messages
+RECV_POLL_TIMEOUT = 0.1  # seconds the receiver waits before re-checking its stop flag
+SEND_TIMEOUT = 5.0  # seconds to wait for send buffer space before treating the server as gone
+READER_IDLE_TIMEOUT = 300  # seconds a pooled receiver thread waits for a new connection before exiting
+# Messages whose payload replaces earlier state; only the last one per drain is applied
+COALESCED_TYPES = frozenset({'player_joined', 'status', 'answer_result'})
 
 # Initialize session state
 if 'sock' not in st.session_state:
@@ -28,19 +65,19 @@ if 'question_start_time' not in st.session_state:
 if 'score' not in st.session_state:
     st.session_state.score = 0
 if 'message_queue' not in st.session_state:
-    st.session_state.message_queue = queue.Queue()
+    st.session_state.message_queue = deque()  # single producer/consumer; append/popleft are atomic
 if 'leaderboard' not in st.session_state:
     st.session_state.leaderboard = []
 if 'player_count' not in st.session_state:
     st.session_state.player_count = 0
 if 'receiver_thread' not in st.session_state:
     st.session_state.receiver_thread = None
+if 'send_buf' not in st.session_state:
+    st.session_state.send_buf = bytearray()  # outbound frames, flushed once per UI event
+if 'socket_queue' not in st.session_state:
+    st.session_state.socket_queue = queue.Queue()  # connections handed to the receiver thread
 if 'receiver_running' not in st.session_state:
     st.session_state.receiver_running = False
-if 'rerun_counter' not in st.session_state:
-    st.session_state.rerun_counter = 0
-if 'timer_tick' not in st.session_state:
-    st.session_state.timer_tick = 0
 if 'waiting_for_result' not in st.session_state:
     st.session_state.waiting_for_result = False
 if 'show_answer_form' not in st.session_state:
@@ -53,59 +90,137 @@ if 'total_rounds' not in st.session_state:
     st.session_state.total_rounds = 0
 if 'is_host' not in st.session_state:
     st.session_state.is_host = False
-if 'lobby_poll_tick' not in st.session_state:
-    st.session_state.lobby_poll_tick = 0
+
+def _frame(body):
+    """Prefix an encoded message body with its length"""
+    return _pack_header(len(body)) + body
+
+def _encode_frame(message_type, data_items):
+    """Serialize a frame from a tuple of (key, value) pairs"""
+    return _frame(_dumps({'type': message_type, 'data': dict(data_items)}))
+
+# Keep the memoized encoder in session state so it survives script reruns
+if 'encode_frame' not in st.session_state:
+    st.session_state.encode_frame = lru_cache(maxsize=64)(_encode_frame)
 
 def send_message(message_type, data):
-    """Send a message to the server"""
+    """Queue a message for the server; it goes out on the next flush_sends()"""
     if not st.session_state.connected or not st.session_state.sock:
         return False
     
-    message = {
-        'type': message_type,
-        'data': data
-    }
     try:
-        print(f"[DEBUG] Sending message type: {message_type}, data: {data}")
-        st.session_state.sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        log.debug("Sending message type: %s, data: %s", message_type, data)
+        buf = st.session_state.send_buf
+        try:
+            # Repeated messages (start_game, register) reuse their encoded frame
+            buf += st.session_state.encode_frame(message_type, tuple(sorted(data.items())))
+        except TypeError:
+            # Unhashable payload values; encode this one directly
+            buf += _frame(_dumps({'type': message_type, 'data': data}))
+        return True
+    except Exception as e:
+        st.error(f"Error sending message: {e}")
+        return False
+
+def flush_sends():
+    """Write all queued frames to the server with a single send"""
+    buf = st.session_state.send_buf
+    if not buf:
+        return True
+    if not st.session_state.connected or not st.session_state.sock:
+        buf.clear()
+        return False
+    try:
+        _sendall(st.session_state.sock, buf)
         return True
+    except TimeoutError:
+        disconnect()
+        st.error("Server stopped accepting data; disconnected.")
+        return False
     except Exception as e:
         st.error(f"Error sending message: {e}")
         return False
+    finally:
+        buf.clear()
+
+def rerun():
+    """Flush queued frames, then restart the script (st.rerun() never returns)"""
+    flush_sends()
+    st.rerun()
+
+def _sendall(sock, data):
+    """sendall() for the non-blocking socket: wait for buffer space instead of raising.
+    Raises TimeoutError if the server takes no data for SEND_TIMEOUT seconds."""
+    sent = 0
+    sel = None  # only built if the send buffer actually fills up
+    try:
+        while sent < len(data):
+            try:
+                sent += sock.send(data[sent:] if sent else data)
+            except BlockingIOError:
+                if sel is None:
+                    sel = selectors.DefaultSelector()
+                    sel.register(sock, selectors.EVENT_WRITE)
+                if not sel.select(SEND_TIMEOUT):
+                    raise TimeoutError("server stopped reading")
+    finally:
+        if sel is not None:
+            sel.close()
 
-def receive_messages(sock, message_queue, running_flag):
+def receive_messages(sock, message_queue, running_flag, ready):
     """Receive and handle messages from server (runs in background thread)"""
-    buffer = ""
+    recv_buf = bytearray(BUFFER_SIZE)
+    mv = memoryview(recv_buf)
+    buffer = bytearray()
+    start = 0  # offset of the first unconsumed byte in buffer
+    sel = selectors.DefaultSelector()
+    sel.register(sock, selectors.EVENT_READ)
+    ready.set()  # Tell connect_to_server it is safe to register
     try:
         while running_flag[0] and sock:
             try:
-                data = sock.recv(BUFFER_SIZE)
-                if not data:
+                if not sel.select(timeout=RECV_POLL_TIMEOUT):
+                    continue  # Nothing to read; re-check running_flag
+                
+                # Drain everything the kernel has queued before framing
+                closed = False
+                while True:
+                    try:
+                        n = sock.recv_into(mv, BUFFER_SIZE)
+                    except BlockingIOError:
+                        break
+                    if n == 0:
+                        closed = True
+                        break
+                    buffer += mv[:n]
+                    if n < BUFFER_SIZE:
+                        break  # Short read: nothing left, skip the EAGAIN round-trip
+                
+                # Queue complete frame bodies as raw bytes;
+                # JSON decoding happens on the UI side in process_messages
+                while len(buffer) - start >= 4:
+                    end = start + 4 + _unpack_header(buffer, start)[0]
+                    if len(buffer) < end:
+                        break  # Rest of the body has not arrived yet
+                    message_queue.append(bytes(buffer[start + 4:end]))
+                    start = end
+                
+                # Reclaim consumed bytes once per read instead of once per frame
+                del buffer[:start]
+                start = 0
+                
+                if closed:
                     # Connection closed by server
-                    message_queue.put({
+                    message_queue.append({
                         'type': 'disconnected',
                         'data': {'message': 'Connection closed by server'}
                     })
                     break
-                
-                buffer += data.decode('utf-8')
-                
-                # Process complete messages (delimited by newline)
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    if not line.strip():
-                        continue
-                    
-                    try:
-                        message = json.loads(line)
-                        message_queue.put(message)
-                    except json.JSONDecodeError:
-                        pass
             
             except socket.error as e:
                 # Connection error
                 if running_flag[0]:
-                    message_queue.put({
+                    message_queue.append({
                         'type': 'error',
                         'data': {'message': f'Connection error: {e}'}
                     })
@@ -113,134 +228,206 @@ def receive_messages(sock, message_queue, running_flag):
             except Exception as e:
                 # Other errors
                 if running_flag[0]:
-                    message_queue.put({
+                    message_queue.append({
                         'type': 'error',
                         'data': {'message': f'Error: {e}'}
                     })
                 break
     except Exception as e:
-        message_queue.put({
+        message_queue.append({
             'type': 'error',
             'data': {'message': f'Receiver thread error: {e}'}
         })
+    finally:
+        # The receiver owns the socket so disconnect() never closes it mid-read
+        sel.close()
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+def reader_loop(socket_queue, message_queue):
+    """Long-lived receiver thread: serve each new connection from socket_queue in turn"""
+    while True:
+        try:
+            sock, running_flag, ready = socket_queue.get(timeout=READER_IDLE_TIMEOUT)
+        except queue.Empty:
+            return  # session disconnected or abandoned; connect_to_server starts a new one
+        receive_messages(sock, message_queue, running_flag, ready)
+
+def _ensure_receiver_thread():
+    """Start the session's receiver thread unless it is still running"""
+    if st.session_state.receiver_thread is None or not st.session_state.receiver_thread.is_alive():
+        receiver_thread = threading.Thread(
+            target=reader_loop,
+            args=(st.session_state.socket_queue, st.session_state.message_queue),
+            daemon=True
+        )
+        receiver_thread.start()
+        st.session_state.receiver_thread = receiver_thread
+
+def _h_registered(msg_data):
+    """Registration accepted by the server"""
+    st.session_state.registered = True
+    st.session_state.player_count = msg_data.get('player_count', 0)
+    st.session_state.is_host = msg_data.get('is_host', False)
+    return True
+
+def _h_player_joined(msg_data):
+    """Another player joined the lobby"""
+    st.session_state.player_count = msg_data.get('total_players', 0)
+    return True
+
+def _h_game_start(msg_data):
+    """Host started a new game"""
+    st.session_state.game_active = True
+    st.session_state.score = 0
+    return True
+
+def _h_question(msg_data):
+    """New question pushed by the server"""
+    # Initialize new question (make sure to reset answered flag)
+    msg_data['answered'] = False
+    msg_data['answer_feedback'] = None  # Clear any old feedback
+    st.session_state.current_question = msg_data
+    # Ensure UI switches to active game even if 'game_start' was missed
+    st.session_state.game_active = True
+    st.session_state.question_start_time = time.time()
+    st.session_state.waiting_for_result = False
+    st.session_state.show_answer_form = True
+    # Clear any previous round leaderboard on new question
+    st.session_state.round_leaderboard = []
+    st.session_state.round_number = msg_data.get('question_number', 0) - 1 if msg_data.get('question_number') else 0
+    log.debug("New question received: Q%s", msg_data.get('question_number'))
+    return True
+
+def _h_answer_result(msg_data):
+    """Server scored our answer"""
+    correct = msg_data.get('correct', False)
+    points = msg_data.get('points', 0)
+    st.session_state.score = msg_data.get('total_score', 0)
+    # Store answer result but don't clear question yet
+    # The question will be cleared when next question arrives or question_end
+    if st.session_state.current_question:
+        st.session_state.current_question['answer_feedback'] = {
+            'correct': correct,
+            'points': points,
+            'correct_answer': msg_data.get('correct_answer', '')
+        }
+    # Result arrived; no longer waiting
+    st.session_state.waiting_for_result = False
+    st.session_state.show_answer_form = False
+    return True
+
+def _h_question_end(msg_data):
+    """Question time ran out"""
+    st.session_state.current_question = None
+    correct_answer = msg_data.get('correct_answer', '')
+    st.info(f"⏱ Time's up! Correct answer: {correct_answer}")
+    st.session_state.waiting_for_result = False
+    st.session_state.show_answer_form = False
+    return True
+
+def _h_leaderboard(msg_data):
+    """Mid-game leaderboard after a round"""
+    # Mid-game leaderboard update after a round
+    st.session_state.round_leaderboard = msg_data.get('leaderboard', [])
+    st.session_state.round_number = msg_data.get('round', st.session_state.round_number)
+    st.session_state.total_rounds = msg_data.get('total_rounds', st.session_state.total_rounds)
+    return True
+
+def _h_host_update(msg_data):
+    """Host changed after a disconnect"""
+    # Update host info (compare by name)
+    host_name = msg_data.get('host_name')
+    if host_name is not None:
+        st.session_state.is_host = (host_name == st.session_state.player_name)
+    return True
+
+def _h_game_end(msg_data):
+    """Final leaderboard"""
+    st.session_state.game_active = False
+    st.session_state.current_question = None
+    st.session_state.leaderboard = msg_data.get('leaderboard', [])
+    st.session_state.waiting_for_result = False
+    st.session_state.show_answer_form = False
+    st.session_state.round_leaderboard = []
+    st.session_state.round_number = 0
+    return True
+
+def _h_error(msg_data):
+    """Error reported by the server or receiver thread"""
+    st.error(f"❌ {msg_data.get('message')}")
+    return False
+
+def _h_disconnected(msg_data):
+    """Connection closed by the server"""
+    st.session_state.connected = False
+    st.session_state.registered = False
+    st.error(f"❌ {msg_data.get('message')}")
+    st.session_state.round_leaderboard = []
+    st.session_state.round_number = 0
+    return True
+
+def _h_status(msg_data):
+    """Reply to get_status"""
+    st.session_state.game_active = msg_data.get('active_game', False)
+    st.session_state.player_count = msg_data.get('player_count', 0)
+    return False
+
+# Message type -> handler; each handler returns whether the UI needs a rerun
+_HANDLERS = {
+    'registered': _h_registered,
+    'player_joined': _h_player_joined,
+    'game_start': _h_game_start,
+    'question': _h_question,
+    'answer_result': _h_answer_result,
+    'question_end': _h_question_end,
+    'leaderboard': _h_leaderboard,
+    'host_update': _h_host_update,
+    'game_end': _h_game_end,
+    'error': _h_error,
+    'disconnected': _h_disconnected,
+    'status': _h_status,
+}
 
 def process_messages():
     """Process messages from the queue"""
     messages_processed = False
     should_rerun = False
     
-    while not st.session_state.message_queue.empty():
+    # The queue holds raw frames from the server plus dicts posted by the receiver itself
+    dq = st.session_state.message_queue
+    batch = []
+    while dq:
+        item = dq.popleft()
+        if isinstance(item, dict):
+            batch.append(item)
+            continue
         try:
-            message = st.session_state.message_queue.get_nowait()
-            msg_type = message.get('type')
-            msg_data = message.get('data', {})
-            messages_processed = True
-            
-            # Debug: Log received message type
-            print(f"[DEBUG] Received message type: {msg_type}")
-            
-            if msg_type == 'registered':
-                st.session_state.registered = True
-                st.session_state.player_count = msg_data.get('player_count', 0)
-                st.session_state.is_host = msg_data.get('is_host', False)
-                should_rerun = True
-            
-            elif msg_type == 'player_joined':
-                st.session_state.player_count = msg_data.get('total_players', 0)
-                should_rerun = True
-            
-            elif msg_type == 'game_start':
-                st.session_state.game_active = True
-                st.session_state.score = 0
-                should_rerun = True
-            
-            elif msg_type == 'question':
-                # Initialize new question (make sure to reset answered flag)
-                msg_data['answered'] = False
-                msg_data['answer_feedback'] = None  # Clear any old feedback
-                st.session_state.current_question = msg_data
-                # Ensure UI switches to active game even if 'game_start' was missed
-                st.session_state.game_active = True
-                st.session_state.question_start_time = time.time()
-                # Reset any waiting counters when a fresh question arrives
-                st.session_state.rerun_counter = 0
-                st.session_state.timer_tick = 0
-                st.session_state.waiting_for_result = False
-                st.session_state.show_answer_form = True
-                # Clear any previous round leaderboard on new question
-                st.session_state.round_leaderboard = []
-                st.session_state.round_number = msg_data.get('question_number', 0) - 1 if msg_data.get('question_number') else 0
-                print(f"[DEBUG] New question received: Q{msg_data.get('question_number')}")
-                should_rerun = True
-            
-            elif msg_type == 'answer_result':
-                correct = msg_data.get('correct', False)
-                points = msg_data.get('points', 0)
-                st.session_state.score = msg_data.get('total_score', 0)
-                # Store answer result but don't clear question yet
-                # The question will be cleared when next question arrives or question_end
-                if st.session_state.current_question:
-                    st.session_state.current_question['answer_feedback'] = {
-                        'correct': correct,
-                        'points': points,
-                        'correct_answer': msg_data.get('correct_answer', '')
-                    }
-                # Result arrived; no longer waiting
-                st.session_state.waiting_for_result = False
-                st.session_state.show_answer_form = False
-                should_rerun = True
-            
-            elif msg_type == 'question_end':
-                st.session_state.current_question = None
-                correct_answer = msg_data.get('correct_answer', '')
-                st.info(f"⏱ Time's up! Correct answer: {correct_answer}")
-                # Reset counter so waiting loop can begin cleanly
-                st.session_state.rerun_counter = 0
-                st.session_state.waiting_for_result = False
-                st.session_state.show_answer_form = False
-                should_rerun = True
-            
-            elif msg_type == 'leaderboard':
-                # Mid-game leaderboard update after a round
-                st.session_state.round_leaderboard = msg_data.get('leaderboard', [])
-                st.session_state.round_number = msg_data.get('round', st.session_state.round_number)
-                st.session_state.total_rounds = msg_data.get('total_rounds', st.session_state.total_rounds)
-                should_rerun = True
-            
-            elif msg_type == 'host_update':
-                # Update host info (compare by name)
-                host_name = msg_data.get('host_name')
-                if host_name is not None:
-                    st.session_state.is_host = (host_name == st.session_state.player_name)
-                should_rerun = True
-            
-            elif msg_type == 'game_end':
-                st.session_state.game_active = False
-                st.session_state.current_question = None
-                st.session_state.leaderboard = msg_data.get('leaderboard', [])
-                st.session_state.waiting_for_result = False
-                st.session_state.show_answer_form = False
-                st.session_state.round_leaderboard = []
-                st.session_state.round_number = 0
-                should_rerun = True
-            
-            elif msg_type == 'error':
-                st.error(f"❌ {msg_data.get('message')}")
-            
-            elif msg_type == 'disconnected':
-                st.session_state.connected = False
-                st.session_state.registered = False
-                st.error(f"❌ {msg_data.get('message')}")
-                st.session_state.round_leaderboard = []
-                st.session_state.round_number = 0
-                should_rerun = True
-            
-            elif msg_type == 'status':
-                st.session_state.game_active = msg_data.get('active_game', False)
-                st.session_state.player_count = msg_data.get('player_count', 0)
+            batch.append(_loads(item))
+        except json.JSONDecodeError:  # also raised by orjson
+            pass
+    
+    # Index of the last message of each coalesced type (e.g. a burst of player_joined)
+    last_index = {}
+    for i, message in enumerate(batch):
+        if message.get('type') in COALESCED_TYPES:
+            last_index[message['type']] = i
+    
+    for i, message in enumerate(batch):
+        msg_type = message.get('type')
+        messages_processed = True
+        if msg_type in COALESCED_TYPES and last_index[msg_type] != i:
+            continue  # Superseded by a later message of the same type
+        msg_data = message.get('data', {})
         
-        except queue.Empty:
-            break
+        # Debug: Log received message type
+        log.debug("Received message type: %s", msg_type)
+        
+        handler = _HANDLERS.get(msg_type)
+        if handler is not None and handler(msg_data):
+            should_rerun = True
     
     # Return whether a rerun is needed instead of calling st.rerun() here
     return messages_processed, should_rerun
@@ -250,25 +437,32 @@ def connect_to_server(host, port, name):
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.connect((host, port))
+        # Flush small frames (register, answer) immediately instead of waiting on Nagle
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Let the OS detect a dead server even while we are idle in recv
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # The receiver drains reads until EAGAIN; sends go through _sendall
+        sock.setblocking(False)
         
         st.session_state.sock = sock
         st.session_state.connected = True
         st.session_state.server_host = host
         
-        # Create thread-safe flag and start receiver thread
+        # Create thread-safe flag and hand the socket to the receiver thread
         running_flag = [True]  # Use list so reference is shared
         st.session_state.receiver_running = running_flag
-        receiver_thread = threading.Thread(
-            target=receive_messages, 
-            args=(sock, st.session_state.message_queue, running_flag),
-            daemon=True
-        )
-        receiver_thread.start()
-        st.session_state.receiver_thread = receiver_thread
+        ready = threading.Event()
+        # One receiver thread per session, kept warm across reconnects
+        _ensure_receiver_thread()
+        st.session_state.socket_queue.put((sock, running_flag, ready))
         
-        # Register with server
-        time.sleep(0.2)
+        # Register with server once the receiver is listening
+        if not ready.wait(timeout=1.0):
+            # The old thread may have hit its idle timeout just before the put
+            _ensure_receiver_thread()
+            ready.wait(timeout=1.0)
         send_message('register', {'name': name})
+        flush_sends()  # don't hold registration back until the caller's rerun
         
         return True
     except Exception as e:
@@ -277,11 +471,10 @@ def connect_to_server(host, port, name):
 
 def disconnect():
     """Disconnect from server"""
-    # Stop receiver thread
+    # Stop receiver thread; it closes the socket within RECV_POLL_TIMEOUT
     if st.session_state.receiver_running and isinstance(st.session_state.receiver_running, list):
         st.session_state.receiver_running[0] = False
-    
-    if st.session_state.sock:
+    elif st.session_state.sock:
         try:
             st.session_state.sock.close()
         except:
@@ -296,6 +489,16 @@ def disconnect():
     st.session_state.leaderboard = []
     st.session_state.player_count = 0
     st.session_state.receiver_running = False
+    st.session_state.send_buf.clear()
+
+def schedule_poll():
+    """Re-run the script after POLL_INTERVAL_MS to pick up queued server messages"""
+    if st_autorefresh is not None:
+        # Browser-side timer: the script thread stays idle between refreshes
+        st_autorefresh(interval=POLL_INTERVAL_MS, key="poll")
+    else:
+        time.sleep(POLL_INTERVAL_MS / 1000)
+        rerun()
 
 def render_leaderboard():
     """Render the final leaderboard UI"""
@@ -325,6 +528,8 @@ def render_leaderboard():
     st.header("🏆 Final Leaderboard")
     st.markdown("---")
     
+    # Build every card first and send them to the frontend in a single element
+    cards = []
     for i, entry in enumerate(st.session_state.leaderboard, 1):
         medal = ""
         if i == 1:
@@ -339,18 +544,19 @@ def render_leaderboard():
         style = "border: 3px solid #1f77b4; padding: 15px; border-radius: 8px; background-color: #e6f3ff;"
         normal_style = "padding: 10px; border-radius: 5px;"
         
-        st.markdown(f"""
+        cards.append(f"""
         <div class="leaderboard-card hot-card" style="{style if is_you else normal_style}">
             <h3>{medal} {i}. {entry['name']}: {entry['score']} points</h3>
         </div>
-        """, unsafe_allow_html=True)
+        """)
+    st.markdown("\n".join(cards), unsafe_allow_html=True)
     
     st.markdown("---")
     
     if st.button("🔄 Start New Game", type="primary", use_container_width=True):
         send_message('start_game', {})
         st.session_state.leaderboard = []
-        st.rerun()
+        rerun()
 
 def render_round_leaderboard():
     """Render the mid-game leaderboard after each round"""
@@ -361,6 +567,7 @@ def render_round_leaderboard():
     if not st.session_state.round_leaderboard:
         st.info("Leaderboard will appear here after each round.")
         return
+    cards = []
     for i, entry in enumerate(st.session_state.round_leaderboard, 1):
         medal = ""
         if i == 1:
@@ -372,18 +579,15 @@ def render_round_leaderboard():
         is_you = entry['name'] == st.session_state.player_name
         style = "border: 2px solid var(--accent); padding: 12px; border-radius: 10px; background-color: rgba(255,255,255,0.06);"
         normal_style = "padding: 8px; border-radius: 8px;"
-        st.markdown(f"""
+        cards.append(f"""
         <div class="leaderboard-card hot-card" style="{style if is_you else normal_style}">
             <h4>{medal} {i}. {entry['name']}: {entry['score']} points</h4>
         </div>
-        """, unsafe_allow_html=True)
-
-# Main UI
-st.set_page_config(page_title="TCP Quiz Game", page_icon="🎮", layout="wide")
+        """)
+    st.markdown("\n".join(cards), unsafe_allow_html=True)
 
-# Global styling (hotter UI)
-st.markdown(
-    """
+# Global stylesheet, injected at the top of every run
+_CSS = """
     <style>
     :root {
         --primary: #ff3b7f; /* hot pink */
@@ -431,9 +635,14 @@ st.markdown(
         color: #fff !important;
     }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
+    """
+
+# Main UI
+st.set_page_config(page_title="TCP Quiz Game", page_icon="🎮", layout="wide")
+
+# Global styling (hotter UI)
+# Streamlit drops elements a run does not re-emit, so this is sent on every run
+st.markdown(_CSS, unsafe_allow_html=True)
 
 st.title("🎮 TCP Quiz Game Client")
 st.markdown("**CS411 - Lab 4: Network Socket Programming**")
@@ -441,14 +650,10 @@ st.markdown("**CS411 - Lab 4: Network Socket Programming**")
 st.markdown("---")
 
 # Process incoming messages (do this first to handle any queued messages)
-# Process multiple times to catch rapid messages
-for _ in range(3):  # Try processing multiple times
-    _, needs_rerun = process_messages()
-    if needs_rerun:
-        st.rerun()
-    if st.session_state.message_queue.empty():
-        break
-    time.sleep(0.05)  # Small delay to let messages arrive
+# One drain is enough: anything arriving later is picked up by the next poll
+_, needs_rerun = process_messages()
+if needs_rerun:
+    rerun()
 
 # Connection Section
 if not st.session_state.connected:
@@ -468,7 +673,7 @@ if not st.session_state.connected:
             st.session_state.player_name = player_name
             st.success("Connecting...")
             time.sleep(0.5)
-            st.rerun()
+            rerun()
 
 else:
     # Connected - Show game interface
@@ -490,24 +695,20 @@ else:
     with col4:
         if st.button("🔌 Disconnect", use_container_width=True):
             disconnect()
-            st.rerun()
+            rerun()
     
     st.markdown("---")
     
+    # Silent polling to process incoming messages; off on the final leaderboard
+    needs_poll = True
+    
     # Game Status
     if not st.session_state.registered:
         st.info("Registering with server...")
-        # Silent polling while waiting to register
-        if st.session_state.lobby_poll_tick < 400:
-            st.session_state.lobby_poll_tick += 1
-            time.sleep(0.3)
-            st.rerun()
-        else:
-            st.session_state.lobby_poll_tick = 0
     
     elif st.session_state.leaderboard:
         # Show final leaderboard regardless of game_active
-        st.session_state.lobby_poll_tick = 0  # reset lobby polling when not in lobby
+        needs_poll = False
         render_leaderboard()
     
     elif not st.session_state.game_active:
@@ -519,25 +720,17 @@ else:
             if st.session_state.is_host:
                 if st.button("🚀 Start Game", type="primary"):
                     send_message('start_game', {})
+                    flush_sends()  # send now, not after the pause below
                     st.info("Starting game...")
                     time.sleep(0.5)
-                    st.rerun()
+                    rerun()
             else:
                 st.caption("Only the host can start the game.")
         else:
             st.warning("No players connected")
-
-        # Silent polling in lobby to process incoming messages (e.g., game_start, question)
-        if st.session_state.lobby_poll_tick < 400:  # ~120s at 0.3s
-            st.session_state.lobby_poll_tick += 1
-            time.sleep(0.3)
-            st.rerun()
-        else:
-            st.session_state.lobby_poll_tick = 0
     
     else:
         # Active Game
-        st.session_state.lobby_poll_tick = 0  # reset lobby polling when in game
         if st.session_state.current_question:
             # Show current question with quiz app styling
             question = st.session_state.current_question
@@ -572,13 +765,6 @@ else:
             # Numeric countdown only (no progress bar)
             st.metric("Time left", f"{time_remaining:.1f}s")
             
-            # Auto-refresh when time runs out to catch server's question_end message (no waiting UI)
-            if time_remaining <= 0:
-                if st.session_state.rerun_counter < 10:  # Just a few times
-                    st.session_state.rerun_counter += 1
-                    time.sleep(0.3)
-                    st.rerun()
-            
             # Check current UI state flags
             question_answered = question.get('answered', False)
             answer_feedback = question.get('answer_feedback', None)
@@ -587,7 +773,7 @@ else:
             # Persist the derived waiting state to avoid flicker between reruns
             st.session_state.waiting_for_result = waiting_for_result
             
-            print(f"[DEBUG UI] Q{question_num}: answered={question_answered}, has_feedback={answer_feedback is not None}")
+            log.debug("UI Q%s: answered=%s, has_feedback=%s", question_num, question_answered, answer_feedback is not None)
             
             if answer_feedback:
                 # Show feedback from server
@@ -595,87 +781,57 @@ else:
                     st.success(f"🎉 Correct! You earned {answer_feedback['points']} points")
                 else:
                     st.error(f"❌ Incorrect. The correct answer was **{answer_feedback['correct_answer']}**")
-
-                # Auto-refresh to catch next question quickly (no waiting UI)
-                if st.session_state.rerun_counter < 150:  # 30 seconds max
-                    st.session_state.rerun_counter += 1
-                    time.sleep(0.2)
-                    st.rerun()
                 
-            elif waiting_for_result:
-                # Hide submit UI immediately; silently poll for server response
-                if st.session_state.rerun_counter < 50:  # up to ~10s
-                    st.session_state.rerun_counter += 1
-                    time.sleep(0.2)
-                    st.rerun()
-                else:
-                    st.session_state.rerun_counter = 0  # Reset for next question
-            else:
-                # Reset counter when showing question form
-                st.session_state.rerun_counter = 0
+            elif not waiting_for_result:
                 # Answer options using radio buttons (like quiz_app.py)
-                selected_option = None
+                # The radio yields the option index, which maps straight to the answer letter
+                answer_letter = None
                 if st.session_state.show_answer_form and not waiting_for_result and not answer_feedback:
-                    selected_option = st.radio(
+                    options = question['options']
+                    selected_idx = st.radio(
                         "Choose your answer:",
-                        question['options'],
+                        range(len(options)),
+                        format_func=lambda i: options[i],
                         key=f"answer_{question_num}",
                         disabled=False
                     )
-                
-                # Extract answer letter from selected option
-                answer_letter = None
-                if selected_option:
-                    # Option format: "A) Option text"
-                    if len(selected_option) > 0 and selected_option[0].isalpha():
-                        answer_letter = selected_option[0].upper()
-                    # Or if it's just the letter
-                    elif selected_option.upper() in ['A', 'B', 'C', 'D']:
-                        answer_letter = selected_option.upper()
+                    if selected_idx is not None:
+                        answer_letter = "ABCD"[selected_idx]
                 
                 # Submit Answer button
                 if st.session_state.show_answer_form and not waiting_for_result and not answer_feedback and st.button("✅ Submit Answer", type="primary", use_container_width=True):
                     if answer_letter:
-                        print(f"[DEBUG] Submitting answer: {answer_letter}")
+                        log.debug("Submitting answer: %s", answer_letter)
                         # Immediately mark as answered so the button hides on next render
                         st.session_state.current_question['answered'] = True
                         st.session_state.current_question['selected_answer'] = answer_letter
                         st.session_state.waiting_for_result = True
                         st.session_state.show_answer_form = False
-                        # Try to send the answer; if it fails, revert the flag
-                        if not send_message('answer', {'answer': answer_letter}):
+                        # Try to send the answer right away; if it fails, revert the flag
+                        if not (send_message('answer', {'answer': answer_letter}) and flush_sends()):
                             st.session_state.current_question['answered'] = False
                             st.session_state.waiting_for_result = False
                             st.session_state.show_answer_form = True
                             st.error("Failed to send answer to server")
                         # Trigger rerun to update UI (hide button)
-                        st.rerun()
+                        rerun()
                     else:
                         st.warning("Please select an answer first")
-
-            # Schedule countdown refresh AFTER rendering the UI so options are visible
-            if not question.get('answered', False) and not waiting_for_result and not answer_feedback and time_remaining > 0:
-                if st.session_state.timer_tick < 120:  # ~60 seconds at 0.5s steps
-                    st.session_state.timer_tick += 1
-                    time.sleep(0.5)
-                    st.rerun()
         
         elif st.session_state.leaderboard:
             # Fallback (active game path) - show leaderboard
+            needs_poll = False
             render_leaderboard()
         
         else:
-            # Waiting between questions: show round leaderboard if available and silently poll for next question
+            # Waiting between questions: show round leaderboard if available until the next question arrives
             if st.session_state.round_leaderboard:
                 render_round_leaderboard()
                 st.markdown("---")
-            # Auto-refresh while waiting for the server to push the next question
-            if st.session_state.game_active:
-                if st.session_state.rerun_counter < 120:  # ~36s total at 0.3s per tick
-                    st.session_state.rerun_counter += 1
-                    time.sleep(0.3)
-                    st.rerun()
-                else:
-                    # Safety reset in case we somehow miss the next question
-                    st.session_state.rerun_counter = 0
+    
+    # Send everything queued during this run, then schedule the refresh
+    # AFTER rendering the UI so options are visible
+    flush_sends()
+    if needs_poll:
+        schedule_poll()
 
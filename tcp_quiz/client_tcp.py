@@ -7,11 +7,26 @@ Note: For GUI, use app.py (Streamlit) instead
 
 import socket
 import json
+import struct
 import threading
 import time
 import sys
 
-BUFFER_SIZE = 4096
+try:
+    import orjson
+    _dumps = orjson.dumps  # returns UTF-8 bytes directly
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+BUFFER_SIZE = 65536  # receive buffer, allocated once per receiver thread
+# Wire format: each message is a 4-byte big-endian length followed by a JSON body
+_HEADER = struct.Struct('>I')  # compiled once; used for every frame
+_pack_header = _HEADER.pack
+_unpack_header = _HEADER.unpack_from
 
 class TCPQuizClient:
     def __init__(self, server_host, server_port, player_name):
@@ -31,6 +46,8 @@ class TCPQuizClient:
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.connect((self.server_host, self.server_port))
+            # Small interactive messages (answers) should not wait on Nagle
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             print(f"Connected to server at {self.server_host}:{self.server_port}")
             return True
         except Exception as e:
@@ -44,33 +61,43 @@ class TCPQuizClient:
             'data': data
         }
         try:
-            self.sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            body = _dumps(message)
+            self.sock.sendall(_pack_header(len(body)) + body)
         except Exception as e:
             print(f"Error sending message: {e}")
     
     def receive_messages(self):
         """Receive and handle messages from server"""
-        buffer = ""
+        buffer = bytearray()
+        recv_buf = bytearray(BUFFER_SIZE)
+        mv = memoryview(recv_buf)
         while self.running:
             try:
-                data = self.sock.recv(BUFFER_SIZE)
-                if not data:
+                n = self.sock.recv_into(mv)
+                if not n:
                     print("Connection closed by server")
                     break
                 
-                buffer += data.decode('utf-8')
+                buffer.extend(mv[:n])
                 
-                # Process complete messages (delimited by newline)
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    if not line.strip():
-                        continue
+                # Process complete frames (length prefix + body), tracking an
+                # offset so each byte is moved at most once per read
+                start = 0
+                while len(buffer) - start >= 4:
+                    end = start + 4 + _unpack_header(buffer, start)[0]
+                    if len(buffer) < end:
+                        break  # Rest of the body has not arrived yet
+                    body = bytes(buffer[start + 4:end])
+                    start = end
                     
                     try:
-                        message = json.loads(line)
+                        message = _loads(body)
                         self.handle_message(message)
-                    except json.JSONDecodeError:
+                    except json.JSONDecodeError:  # also raised by orjson
                         print("Received invalid JSON message")
+                
+                # Drop all consumed frames in one move
+                del buffer[:start]
             
             except Exception as e:
                 if self.running:
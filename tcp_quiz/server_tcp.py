@@ -6,17 +6,42 @@ Demonstrates connection-oriented communication using TCP protocol
 
 import socket
 import json
+import re
+import selectors
+import struct
 import threading
 import time
+from bisect import bisect_left, insort
 from collections import defaultdict
 from datetime import datetime
 import random
 
+try:
+    import orjson
+    _dumps = orjson.dumps  # returns UTF-8 bytes directly
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
 # Server configuration
 HOST = '0.0.0.0'  # Listen on all interfaces
 PORT = 8889
-BUFFER_SIZE = 4096
+BUFFER_SIZE = 65536  # receive buffer, allocated once and shared by the selector loop
+# Wire format: each message is a 4-byte big-endian length followed by a JSON body
+_HEADER = struct.Struct('>I')  # compiled once; used for every frame
+_pack_header = _HEADER.pack
+_unpack_header = _HEADER.unpack_from
+HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')  # not available on Windows
 QUESTION_TIME_LIMIT = 10  # seconds per question (reduced from 30)
+# Points for a correct answer, indexed by whole seconds elapsed; 1 point after the table ends
+POINTS_BY_SECOND = tuple(max(1, (QUESTION_TIME_LIMIT - s - 1) // 5 + 1) for s in range(QUESTION_TIME_LIMIT))
+
+# questions.txt blocks: question line, option lines, then an "ANSWER:<letter>" line
+ANSWER_RE = re.compile(r'^ANSWER:(.*)$', re.MULTILINE)
+OPTION_RE = re.compile(r'^[ \t]*(?!ANSWER:)(\S.*?)[ \t]*$', re.MULTILINE)
 
 class TCPQuizServer:
     def __init__(self):
@@ -25,17 +50,28 @@ class TCPQuizServer:
         self.sock.bind((HOST, PORT))
         self.sock.listen(10)  # Allow up to 10 pending connections
         
+        # One selector multiplexes the listening socket and every client connection
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.sock, selectors.EVENT_READ, data=None)
+        # Only the selector thread reads, so one receive buffer serves every client
+        self._rbuf = bytearray(BUFFER_SIZE)
+        self._rmv = memoryview(self._rbuf)
+        
         # Load questions
         self.questions = self.load_questions()
         random.shuffle(self.questions)
+        # Questions never change after loading, so their frames are built once
+        self.encoded_questions = self.encode_questions()
         
         # Client management (connection_id -> client data)
-        self.clients = {}  # {connection_id: {'conn': socket, 'addr': tuple, 'name': str, 'score': int}}
+        self.clients = {}  # {connection_id: {'conn': socket, 'addr': tuple, 'name': str, 'score': int, 'buffer': bytearray}}
         self.connection_counter = 0
+        self.score_index = []  # sorted [(-score, conn_id)]; the leaderboard order, kept up to date
         self.active_game = False
         self.current_question_index = 0
         self.question_start_time = None
         self.game_lock = threading.Lock()
+        self.question_done = threading.Event()  # set once every player has answered
         self.host_conn_id = None  # connection id of the host (first client)
         
         print(f"TCP Quiz Server started on {HOST}:{PORT}")
@@ -51,53 +87,69 @@ class TCPQuizServer:
             with open(questions_path, 'r') as f:
                 content = f.read()
             
-            question_blocks = content.strip().split('\n\n')
-            for block in question_blocks:
-                if not block.strip():
-                    continue
-                
-                lines = block.strip().split('\n')
-                question = lines[0]
-                options = []
-                answer = None
-                
-                for line in lines[1:]:
-                    if line.startswith('ANSWER:'):
-                        answer = line.split('ANSWER:')[1].strip()
-                    elif line.strip():
-                        options.append(line.strip())
+            for block in content.strip().split('\n\n'):
+                question, _, rest = block.strip().partition('\n')
+                answer = ANSWER_RE.search(rest)
+                options = tuple(OPTION_RE.findall(rest))
                 
                 if question and options and answer:
-                    questions.append({
-                        'question': question,
-                        'options': options,
-                        'answer': answer
-                    })
+                    # (question text, options, correct letter)
+                    questions.append((question, options, answer.group(1).strip()))
         except FileNotFoundError:
             print("Error: questions.txt not found!")
             return []
         
         return questions
     
+    def _encode(self, message_type, data):
+        """Serialize a message into a (length header, body) frame"""
+        body = _dumps({'type': message_type, 'data': data})
+        return _pack_header(len(body)), body
+    
+    def encode_questions(self):
+        """Pre-encode the 'question' frame for every question, in play order"""
+        total = len(self.questions)
+        return [
+            self._encode('question', {
+                'question_number': i + 1,
+                'total_questions': total,
+                'question': question,
+                'options': options,
+                'time_limit': QUESTION_TIME_LIMIT
+            })
+            for i, (question, options, _answer) in enumerate(self.questions)
+        ]
+    
+    def _send_frame(self, conn, frame):
+        """Send a frame's buffers (several frames may be concatenated) with one gathering syscall"""
+        if not HAS_SENDMSG:
+            conn.sendall(b''.join(frame))
+            return
+        sent = conn.sendmsg(frame)
+        if sent < sum(map(len, frame)):
+            # Partial write: finish the remainder the ordinary way
+            conn.sendall(b''.join(frame)[sent:])
+    
     def send_message(self, conn, message_type, data):
         """Send a message to a client connection"""
-        message = {
-            'type': message_type,
-            'data': data,
-            'timestamp': time.time()
-        }
         try:
-            conn.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            self._send_frame(conn, self._encode(message_type, data))
         except Exception as e:
             print(f"Error sending message: {e}")
     
     def broadcast_message(self, message_type, data, exclude_conn_id=None):
         """Broadcast message to all connected clients"""
+        # Encode once; every client gets the same bytes
+        self.broadcast_frame(self._encode(message_type, data), exclude_conn_id)
+    
+    def broadcast_frame(self, frame, exclude_conn_id=None):
+        """Send an already-encoded frame to all connected clients (caller holds game_lock)"""
         disconnected = []
-        for conn_id, client in list(self.clients.items()):
+        # No snapshot needed: clients only change under game_lock, and removals are deferred
+        for conn_id, client in self.clients.items():
             if conn_id != exclude_conn_id:
                 try:
-                    self.send_message(client['conn'], message_type, data)
+                    self._send_frame(client['conn'], frame)
                 except Exception as e:
                     print(f"Error broadcasting to {client['name']}: {e}")
                     disconnected.append(conn_id)
@@ -107,19 +159,26 @@ class TCPQuizServer:
             self.remove_client(conn_id)
     
     def remove_client(self, conn_id):
-        """Remove a client from the game"""
+        """Remove a client from the game (caller holds game_lock)"""
         if conn_id in self.clients:
             client = self.clients[conn_id]
             print(f"Player {client['name']} disconnected")
+            try:
+                self.selector.unregister(client['conn'])
+            except (KeyError, ValueError):
+                pass
             try:
                 client['conn'].close()
             except:
                 pass
+            del self.score_index[bisect_left(self.score_index, (-client['score'], conn_id))]
             del self.clients[conn_id]
+            # The player we were waiting on may have just left
+            self.check_all_answered()
             # Reassign host if needed
             if self.host_conn_id == conn_id:
                 if self.clients:
-                    new_host_id = sorted(self.clients.keys())[0]
+                    new_host_id = min(self.clients)  # ids only grow, so this is the oldest client
                     self.host_conn_id = new_host_id
                     new_host = self.clients[new_host_id]
                     # Notify all clients about new host
@@ -138,7 +197,7 @@ class TCPQuizServer:
             
             player_name = data.get('name', f'Player_{conn_id}')
             self.clients[conn_id]['name'] = player_name
-            self.clients[conn_id]['score'] = 0
+            self.set_score(conn_id, 0)
             self.clients[conn_id]['answers'] = []
             self.clients[conn_id]['answer_times'] = []
             
@@ -155,6 +214,15 @@ class TCPQuizServer:
                 'total_players': len(self.clients)
             }, exclude_conn_id=conn_id)
     
+    def check_all_answered(self):
+        """End the current question early once every player has answered (caller holds game_lock)"""
+        if not self.active_game:
+            return
+        # Only registered players count; unregistered or turned-away sockets never answer
+        players = [client for client in self.clients.values() if client['name']]
+        if players and all(len(client['answers']) > self.current_question_index for client in players):
+            self.question_done.set()
+    
     def handle_client_answer(self, conn_id, conn, data):
         """Handle client answer submission"""
         with self.game_lock:
@@ -173,8 +241,7 @@ class TCPQuizServer:
                 return  # Already answered
             
             answer = data.get('answer', '').upper().strip()
-            question = self.questions[self.current_question_index]
-            correct_answer = question['answer'].strip()
+            correct_answer = self.questions[self.current_question_index][2]
             
             print(f"[DEBUG] Client {client['name']} answered '{answer}' for question {self.current_question_index}, correct: {correct_answer}")
             
@@ -183,11 +250,13 @@ class TCPQuizServer:
             
             client['answers'].append(answer)
             client['answer_times'].append(time_taken)
+            self.check_all_answered()
             
             if is_correct:
-                # Points based on speed (30 seconds max)
-                points = max(1, int((QUESTION_TIME_LIMIT - time_taken) / 5) + 1)
-                client['score'] += points
+                # Points based on speed
+                second = int(time_taken)
+                points = POINTS_BY_SECOND[second] if second < len(POINTS_BY_SECOND) else 1
+                self.set_score(conn_id, client['score'] + points)
             else:
                 points = 0
             
@@ -218,6 +287,7 @@ class TCPQuizServer:
                 client['score'] = 0
                 client['answers'] = []
                 client['answer_times'] = []
+            self.score_index = [(0, conn_id) for conn_id in self.clients]  # ids are already ascending
             
             print(f"Game started with {len(self.clients)} players")
             self.broadcast_message('game_start', {
@@ -230,44 +300,35 @@ class TCPQuizServer:
     
     def game_loop(self):
         """Main game loop - send questions sequentially"""
-        for i, question in enumerate(self.questions):
+        for i, (_question, _options, correct_answer) in enumerate(self.questions):
             if not self.active_game:
                 break
             
             with self.game_lock:
                 self.current_question_index = i
                 self.question_start_time = time.time()
+                self.question_done.clear()
+                # Send the pre-encoded question to all clients
+                self.broadcast_frame(self.encoded_questions[i])
             
-            # Send question to all clients
-            question_data = {
-                'question_number': i + 1,
-                'total_questions': len(self.questions),
-                'question': question['question'],
-                'options': question['options'],
-                'time_limit': QUESTION_TIME_LIMIT
-            }
-            self.broadcast_message('question', question_data)
-            
-            # Wait for time limit
-            time.sleep(QUESTION_TIME_LIMIT)
+            # Wait for time limit, or less if everyone answers first
+            self.question_done.wait(QUESTION_TIME_LIMIT)
             
             # Send correct answer if game still active
             with self.game_lock:
                 if self.active_game:
-                    self.broadcast_message('question_end', {
-                        'correct_answer': question['answer'],
+                    frame_end = self._encode('question_end', {
+                        'correct_answer': correct_answer,
                         'question_number': i + 1
                     })
                     # After each question, send a mid-game leaderboard update
-                    leaderboard = []
-                    for _cid, _client in self.clients.items():
-                        leaderboard.append({'name': _client['name'], 'score': _client['score']})
-                    leaderboard.sort(key=lambda x: x['score'], reverse=True)
-                    self.broadcast_message('leaderboard', {
-                        'leaderboard': leaderboard,
+                    frame_lb = self._encode('leaderboard', {
+                        'leaderboard': self.build_leaderboard(),
                         'round': i + 1,
                         'total_rounds': len(self.questions)
                     })
+                    # Both frames go out together in one write per client
+                    self.broadcast_frame(frame_end + frame_lb)
             
             # Brief pause between questions
             if i < len(self.questions) - 1:
@@ -276,20 +337,26 @@ class TCPQuizServer:
         # Game ended - send final leaderboard
         self.end_game()
     
+    def set_score(self, conn_id, score):
+        """Update a client's score and its place in score_index (caller holds game_lock)"""
+        client = self.clients[conn_id]
+        index = self.score_index
+        del index[bisect_left(index, (-client['score'], conn_id))]
+        client['score'] = score
+        insort(index, (-score, conn_id))
+    
+    def build_leaderboard(self):
+        """Return [{'name', 'score'}, ...] sorted by score, highest first (caller holds game_lock)"""
+        clients = self.clients
+        # score_index is already in leaderboard order; ties keep join order
+        return [{'name': clients[conn_id]['name'], 'score': -neg_score} for neg_score, conn_id in self.score_index]
+    
     def end_game(self):
         """End the game and send final leaderboard"""
         with self.game_lock:
             self.active_game = False
             
-            # Calculate leaderboard
-            leaderboard = []
-            for conn_id, client in self.clients.items():
-                leaderboard.append({
-                    'name': client['name'],
-                    'score': client['score']
-                })
-            
-            leaderboard.sort(key=lambda x: x['score'], reverse=True)
+            leaderboard = self.build_leaderboard()
             
             print("\n=== Final Leaderboard ===")
             for i, entry in enumerate(leaderboard, 1):
@@ -321,8 +388,11 @@ class TCPQuizServer:
             else:
                 self.send_message(conn, 'error', {'message': 'Cannot start game now'})
     
-    def handle_client(self, conn, addr):
-        """Handle a client connection"""
+    def accept_client(self):
+        """Accept a pending connection and start watching it for reads"""
+        conn, addr = self.sock.accept()
+        # Quiz traffic is small interactive frames; don't let Nagle hold them back
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         conn_id = self.connection_counter
         self.connection_counter += 1
         
@@ -335,57 +405,75 @@ class TCPQuizServer:
                 'name': None,
                 'score': 0,
                 'answers': [],
-                'answer_times': []
+                'answer_times': [],
+                'buffer': bytearray()  # Partial frame carried between reads
             }
+            self.score_index.append((0, conn_id))  # newest id sorts last among zero scores
             # Assign host to the first connected client
             if self.host_conn_id is None:
                 self.host_conn_id = conn_id
         
-        try:
-            buffer = ""
-            while True:
-                data = conn.recv(BUFFER_SIZE)
-                if not data:
-                    break
-                
-                buffer += data.decode('utf-8')
-                
-                # Process complete messages (delimited by newline)
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    if not line.strip():
-                        continue
-                    
-                    try:
-                        message = json.loads(line)
-                        msg_type = message.get('type')
-                        msg_data = message.get('data', {})
-                        
-                        if msg_type == 'register':
-                            self.handle_client_register(conn_id, conn, msg_data)
-                        elif msg_type == 'answer':
-                            self.handle_client_answer(conn_id, conn, msg_data)
-                        elif msg_type == 'start_game':
-                            self.handle_request_start_game(conn_id, conn)
-                        elif msg_type == 'get_status':
-                            with self.game_lock:
-                                self.send_message(conn, 'status', {
-                                    'active_game': self.active_game,
-                                    'player_count': len(self.clients),
-                                    'current_question': self.current_question_index
-                                })
-                        else:
-                            self.send_message(conn, 'error', {'message': 'Unknown message type'})
-                    
-                    except json.JSONDecodeError:
-                        self.send_message(conn, 'error', {'message': 'Invalid JSON'})
-                    except Exception as e:
-                        print(f"Error handling message from {addr}: {e}")
+        self.selector.register(conn, selectors.EVENT_READ, data=conn_id)
+    
+    def handle_client(self, conn_id):
+        """Handle data that is ready to read on a client connection"""
+        client = self.clients.get(conn_id)
+        if client is None:
+            return
+        conn = client['conn']
+        addr = client['addr']
+        buffer = client['buffer']
         
+        try:
+            n = conn.recv_into(self._rmv)
         except Exception as e:
             print(f"Error with client {addr}: {e}")
-        finally:
-            self.remove_client(conn_id)
+            n = 0
+        if not n:
+            with self.game_lock:
+                self.remove_client(conn_id)
+            return
+        
+        buffer.extend(self._rmv[:n])
+        
+        # Process complete frames (length prefix + body), tracking an
+        # offset so each byte is moved at most once per read
+        start = 0
+        while len(buffer) - start >= 4:
+            end = start + 4 + _unpack_header(buffer, start)[0]
+            if len(buffer) < end:
+                break  # Rest of the body has not arrived yet
+            body = bytes(buffer[start + 4:end])
+            start = end
+            
+            try:
+                message = _loads(body)
+                msg_type = message.get('type')
+                msg_data = message.get('data', {})
+                
+                if msg_type == 'register':
+                    self.handle_client_register(conn_id, conn, msg_data)
+                elif msg_type == 'answer':
+                    self.handle_client_answer(conn_id, conn, msg_data)
+                elif msg_type == 'start_game':
+                    self.handle_request_start_game(conn_id, conn)
+                elif msg_type == 'get_status':
+                    with self.game_lock:
+                        self.send_message(conn, 'status', {
+                            'active_game': self.active_game,
+                            'player_count': len(self.clients),
+                            'current_question': self.current_question_index
+                        })
+                else:
+                    self.send_message(conn, 'error', {'message': 'Unknown message type'})
+            
+            except json.JSONDecodeError:  # also raised by orjson
+                self.send_message(conn, 'error', {'message': 'Invalid JSON'})
+            except Exception as e:
+                print(f"Error handling message from {addr}: {e}")
+        
+        # Drop all consumed frames in one move
+        del buffer[:start]
     
     def run(self):
         """Main server loop"""
@@ -394,13 +482,17 @@ class TCPQuizServer:
         
         try:
             while True:
-                conn, addr = self.sock.accept()
-                # Handle each client in a separate thread
-                threading.Thread(target=self.handle_client, args=(conn, addr), daemon=True).start()
+                # Single thread: wait until the listener or any client is readable
+                for key, _ in self.selector.select():
+                    if key.data is None:
+                        self.accept_client()
+                    else:
+                        self.handle_client(key.data)
         
         except KeyboardInterrupt:
             print("\nShutting down server...")
         finally:
+            self.selector.close()
             self.sock.close()
             # Close all client connections
             for client in list(self.clients.values()):
@@ -6,18 +6,53 @@ Demonstrates connectionless communication using UDP protocol
 
 import socket
 import json
+import os
+import select
+import selectors
 import threading
 import time
 import sys
 
+from udp_protocol import ANSWER_PACKET, MSG_ANSWER, MSG_REGISTER, MSG_START, MSG_STATUS, tune_socket_buffers
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    _loads = json.loads
+
 BUFFER_SIZE = 4096
+# select() on Windows only accepts sockets, so stdin can't join the selector there;
+# that platform (or a stdin that stdin_selectable() rejects) falls back to a receiver thread
+# plus a blocking input() loop instead
+SELECT_STDIN = sys.platform != 'win32'
+LINK_CHECK_INTERVAL = 0.5  # seconds between link-monitor checks
+def stdin_selectable():
+    """True if stdin can join a selector; epoll refuses regular files and /dev/null"""
+    if not SELECT_STDIN:
+        return False
+    probe = selectors.DefaultSelector()
+    try:
+        probe.register(sys.stdin, selectors.EVENT_READ)
+        return True
+    except (OSError, ValueError):
+        return False
+    finally:
+        probe.close()
 
 class UDPQuizClient:
     def __init__(self, server_host, server_port, player_name):
         self.server_address = (server_host, server_port)
         self.player_name = player_name
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.settimeout(1.0)
+        tune_socket_buffers(self.sock, 4 * BUFFER_SIZE)  # a few queued server datagrams
+        # Non-blocking: both loops only read after select() reports data, so
+        # nothing wakes up on a timer just to poll self.running
+        self.sock.setblocking(False)
+        self._wake_r = self._wake_w = None  # socketpair that stops the receiver thread
+        # Persistent receive buffer, reused for every datagram
+        self._rxbuf = bytearray(BUFFER_SIZE)
         
         self.registered = False
         self.game_active = False
@@ -26,149 +61,212 @@ class UDPQuizClient:
         self.running = True
         # For UDP demo: track last processed sequence number
         self.last_seq = 0
+        self.last_question_number = 0  # highest question shown this game; rebroadcasts repeat it
         # Link monitoring (to illustrate UDP has no connection state)
         self.last_packet_time = time.time()
         self._link_warned = False
+        self._stdin_pending = b''  # partial line typed so far (selector mode)
         
-    def send_message(self, message_type, data):
-        """Send a message to the server"""
-        message = {
-            'type': message_type,
-            'data': data
+        # Server message type -> handler(msg_data)
+        self._handlers = {
+            'registered': self.on_registered,
+            'game_start': self.on_game_start,
+            'question': self.on_question,
+            'answer_result': self.on_answer_result,
+            'question_end': self.on_question_end,
+            'game_end': self.on_game_end,
+            'error': self.on_error,
+            'status': self.on_status,
+            'heartbeat': self.on_heartbeat,
         }
+        
+    def send_packet(self, tag, payload=b''):
+        """Send a tagged binary packet (tag byte + payload) instead of JSON"""
+        try:
+            self.sock.sendto(bytes((tag,)) + payload, self.server_address)
+        except Exception as e:
+            print(f"Error sending message: {e}")
+    
+    def send_answer(self, letter):
+        """Send an answer as a 2-byte binary packet (tag + letter) instead of JSON"""
         try:
-            self.sock.sendto(json.dumps(message).encode('utf-8'), self.server_address)
+            self.sock.sendto(ANSWER_PACKET.pack(MSG_ANSWER, letter.encode('ascii')), self.server_address)
         except Exception as e:
             print(f"Error sending message: {e}")
     
+    def handle_datagram(self, n, address):
+        """Decode one datagram held in the receive buffer and handle it"""
+        if address != self.server_address:
+            return  # Ignore messages from other addresses
+        
+        try:
+            message = _loads(self._rxbuf[:n])  # both decoders accept bytes-like input
+            # Any packet received resets link timer
+            self.last_packet_time = time.time()
+            # Sequence-based duplicate/gap handling (UDP demo)
+            seq = message.get('seq', 0)
+            if seq:
+                if seq <= self.last_seq:
+                    print(f"[CLIENT] Duplicate/old packet seq={seq} (last={self.last_seq}) -> ignored")
+                    return
+                if seq > self.last_seq + 1:
+                    print(f"[CLIENT] GAP detected: expected seq {self.last_seq+1}, got {seq}")
+                self.last_seq = seq
+            self.handle_message(message)
+        except json.JSONDecodeError:  # also raised by orjson
+            print("Received invalid JSON message")
+        except Exception as e:
+            print(f"Error handling message: {e}")
+    
     def receive_messages(self):
-        """Receive and handle messages from server"""
+        """Receive and handle messages from server (receiver thread, used when stdin can't be selected)"""
         while self.running:
+            # Block until a datagram arrives or start() pokes the wake socket on quit
+            ready, _, _ = select.select([self.sock, self._wake_r], [], [])
+            if not self.running or self.sock not in ready:
+                continue
             try:
-                data, address = self.sock.recvfrom(BUFFER_SIZE)
-                
-                if address != self.server_address:
-                    continue  # Ignore messages from other addresses
-                
-                try:
-                    message = json.loads(data.decode('utf-8'))
-                    # Any packet received resets link timer
-                    self.last_packet_time = time.time()
-                    # Sequence-based duplicate/gap handling (UDP demo)
-                    seq = message.get('seq', 0)
-                    if seq:
-                        if seq <= self.last_seq:
-                            print(f"[CLIENT] Duplicate/old packet seq={seq} (last={self.last_seq}) -> ignored")
-                            continue
-                        if seq > self.last_seq + 1:
-                            print(f"[CLIENT] GAP detected: expected seq {self.last_seq+1}, got {seq}")
-                        self.last_seq = seq
-                    self.handle_message(message)
-                except json.JSONDecodeError:
-                    print("Received invalid JSON message")
-                except Exception as e:
-                    print(f"Error handling message: {e}")
-            
-            except socket.timeout:
+                n, address = self.sock.recvfrom_into(self._rxbuf)
+            except BlockingIOError:
                 continue
             except Exception as e:
                 if self.running:
                     print(f"Receive error: {e}")
+                continue
+            self.handle_datagram(n, address)
+    
+    def _on_socket_readable(self):
+        """Selector callback: drain every datagram queued on the non-blocking socket"""
+        while True:
+            try:
+                n, address = self.sock.recvfrom_into(self._rxbuf)
+            except (BlockingIOError, InterruptedError):
+                return True
+            except OSError as e:
+                print(f"Receive error: {e}")
+                return True
+            self.handle_datagram(n, address)
+    
+    def _on_stdin_readable(self):
+        """Selector callback: run each complete line the user typed; False means quit"""
+        chunk = os.read(sys.stdin.fileno(), 1024)
+        if not chunk:
+            return False  # EOF
+        self._stdin_pending += chunk
+        *lines, self._stdin_pending = self._stdin_pending.split(b'\n')
+        for line in lines:
+            if not self.handle_command(line.decode('utf-8', 'replace')):
+                return False
+        return True
     
     def handle_message(self, message):
         """Handle incoming messages from server"""
-        msg_type = message.get('type')
-        msg_data = message.get('data', {})
-        
-        if msg_type == 'registered':
-            self.registered = True
-            print(f"\n✓ {msg_data.get('message')}")
-            print(f"Players connected: {msg_data.get('player_count')}")
-            print("\nType 'start' to begin the game when all players are ready!")
+        handler = self._handlers.get(message.get('type'))
+        if handler:
+            handler(message.get('data', {}))
+    
+    def on_registered(self, msg_data):
+        """Registration confirmed"""
+        self.registered = True
+        self.last_question_number = 0
+        print(f"\n✓ {msg_data.get('message')}")
+        print(f"Players connected: {msg_data.get('player_count')}")
+        print("\nType 'start' to begin the game when all players are ready!")
+    
+    def on_game_start(self, msg_data):
+        """Game is starting"""
+        self.game_active = True
+        self.last_question_number = 0
+        print(f"\n{'='*50}")
+        print(f"🎮 GAME STARTING!")
+        print(f"Total questions: {msg_data.get('total_questions')}")
+        print(f"{'='*50}\n")
+    
+    def on_question(self, msg_data):
+        """New question (or a rebroadcast of the current one)"""
+        # Each rebroadcast carries a fresh seq, so dedupe by question_number: show a
+        # question once (keeping its start time and answered flag), ignore stale ones
+        incoming_q = msg_data.get('question_number', 0)
+        if incoming_q and incoming_q <= self.last_question_number:
+            if incoming_q < self.last_question_number:
+                print(f"[CLIENT] Stale question frame (#{incoming_q}) < current (#{self.last_question_number}) -> ignored")
+            return
+        self.last_question_number = incoming_q
+        self.current_question = msg_data
+        self.question_start_time = time.time()
         
-        elif msg_type == 'game_start':
-            self.game_active = True
-            print(f"\n{'='*50}")
-            print(f"🎮 GAME STARTING!")
-            print(f"Total questions: {msg_data.get('total_questions')}")
-            print(f"{'='*50}\n")
+        print(f"\n{'='*50}")
+        print(f"Question {msg_data['question_number']}/{msg_data['total_questions']}")
+        print(f"{'='*50}")
+        print(f"{msg_data['question']}")
+        print()
         
-        elif msg_type == 'question':
-            # Ignore stale/reordered questions (by question_number)
-            incoming_q = msg_data.get('question_number', 0)
-            current_q = self.current_question.get('question_number', 0) if self.current_question else 0
-            if incoming_q and current_q and incoming_q < current_q:
-                print(f"[CLIENT] Stale question frame (#{incoming_q}) < current (#{current_q}) -> ignored")
-                return
-            if incoming_q and current_q and incoming_q == current_q:
-                print(f"[CLIENT] Rebroadcast question #{incoming_q}")
-            self.current_question = msg_data
-            self.question_start_time = time.time()
-            
-            print(f"\n{'='*50}")
-            print(f"Question {msg_data['question_number']}/{msg_data['total_questions']}")
-            print(f"{'='*50}")
-            print(f"{msg_data['question']}")
-            print()
-            
-            for option in msg_data['options']:
-                print(f"  {option}")
-            
-            time_left = msg_data.get('time_limit', 30)
-            print(f"\n⏱ Time limit: {time_left} seconds")
-            print("Enter your answer (A, B, C, or D): ", end='', flush=True)
+        for option in msg_data['options']:
+            print(f"  {option}")
         
-        elif msg_type == 'answer_result':
-            correct = msg_data.get('correct', False)
-            points = msg_data.get('points', 0)
-            total_score = msg_data.get('total_score', 0)
-            time_taken = msg_data.get('time_taken', 0)
-            
-            print()  # New line after answer input
-            if correct:
-                print(f"✓ Correct! You earned {points} points ({time_taken:.1f}s)")
-            else:
-                correct_answer = msg_data.get('correct_answer', '')
-                print(f"✗ Incorrect. Correct answer was {correct_answer}")
-            print(f"Your total score: {total_score} points\n")
-        
-        elif msg_type == 'question_end':
-            # Question time ended
-            if self.current_question:
-                print(f"\n⏱ Time's up! Correct answer: {msg_data.get('correct_answer')}")
-                print(f"You didn't answer in time.\n")
+        time_left = msg_data.get('time_limit', 30)
+        print(f"\n⏱ Time limit: {time_left} seconds")
+        print("Enter your answer (A, B, C, or D): ", end='', flush=True)
+    
+    def on_answer_result(self, msg_data):
+        """Result for our answer"""
+        correct = msg_data.get('correct', False)
+        points = msg_data.get('points', 0)
+        total_score = msg_data.get('total_score', 0)
+        time_taken = msg_data.get('time_taken', 0)
         
-        elif msg_type == 'game_end':
-            leaderboard = msg_data.get('leaderboard', [])
-            print(f"\n{'='*50}")
-            print("🏆 FINAL LEADERBOARD 🏆")
-            print(f"{'='*50}")
-            for i, entry in enumerate(leaderboard, 1):
-                medal = ""
-                if i == 1:
-                    medal = "🥇"
-                elif i == 2:
-                    medal = "🥈"
-                elif i == 3:
-                    medal = "🥉"
-                
-                print(f"{medal} {i}. {entry['name']}: {entry['score']} points")
-            print(f"{'='*50}\n")
+        print()  # New line after answer input
+        if correct:
+            print(f"✓ Correct! You earned {points} points ({time_taken:.1f}s)")
+        else:
+            correct_answer = msg_data.get('correct_answer', '')
+            print(f"✗ Incorrect. Correct answer was {correct_answer}")
+        print(f"Your total score: {total_score} points\n")
+    
+    def on_question_end(self, msg_data):
+        """Question time ended"""
+        if self.current_question:
+            print(f"\n⏱ Time's up! Correct answer: {msg_data.get('correct_answer')}")
+            print(f"You didn't answer in time.\n")
+    
+    def on_game_end(self, msg_data):
+        """Final leaderboard"""
+        leaderboard = msg_data.get('leaderboard', [])
+        print(f"\n{'='*50}")
+        print("🏆 FINAL LEADERBOARD 🏆")
+        print(f"{'='*50}")
+        for i, entry in enumerate(leaderboard, 1):
+            medal = ""
+            if i == 1:
+                medal = "🥇"
+            elif i == 2:
+                medal = "🥈"
+            elif i == 3:
+                medal = "🥉"
             
-            self.game_active = False
-            self.current_question = None
-            print("Game finished! You can start a new game by typing 'start'")
-        
-        elif msg_type == 'error':
-            print(f"\n❌ Error: {msg_data.get('message')}\n")
+            print(f"{medal} {i}. {entry['name']}: {entry['score']} points")
+        print(f"{'='*50}\n")
         
-        elif msg_type == 'status':
-            print(f"\nStatus: Active game={msg_data.get('active_game')}, "
-                  f"Players={msg_data.get('player_count')}\n")
-        
-        elif msg_type == 'heartbeat':
-            # Keep output minimal but visible in demo
-            print("♥ heartbeat")
+        self.game_active = False
+        self.current_question = None
+        # Also reset here, so losing the next game's single game_start datagram
+        # can't leave its questions looking stale
+        self.last_question_number = 0
+        print("Game finished! You can start a new game by typing 'start'")
+    
+    def on_error(self, msg_data):
+        """Error reported by the server"""
+        print(f"\n❌ Error: {msg_data.get('message')}\n")
+    
+    def on_status(self, msg_data):
+        """Game status reply"""
+        print(f"\nStatus: Active game={msg_data.get('active_game')}, "
+              f"Players={msg_data.get('player_count')}\n")
+    
+    def on_heartbeat(self, msg_data):
+        """Server heartbeat"""
+        # Keep output minimal but visible in demo
+        print("♥ heartbeat")
     
     def submit_answer(self, answer):
         """Submit an answer to the current question"""
@@ -184,41 +282,79 @@ class UDPQuizClient:
                 print("Time limit exceeded!")
                 return
         
-        self.send_message('answer', {'answer': answer.upper().strip()})
+        self.send_answer(answer.upper().strip())
         print("(UDP) Answer sent — no delivery guarantee; result will appear only if the server receives it.")
         self.current_question = None  # Clear to prevent double answering
 
-    def _link_monitor(self):
+    def _check_link(self):
         """Print warnings when no packets are received for a while to illustrate UDP's lack of connection state."""
         WARN_AFTER = 5.0  # seconds without any packet
         RESTORED_AFTER = 2.0
+        delta = time.time() - self.last_packet_time
+        if delta >= WARN_AFTER and not self._link_warned:
+            print("\n[LINK?] No packets from server for", f"{delta:.1f}s",
+                  "— UDP won't tell you you're disconnected. Waiting for traffic to resume...\n")
+            self._link_warned = True
+        if self._link_warned and delta < RESTORED_AFTER:
+            print("\n[LINK] Server contact restored (packets received).\n")
+            self._link_warned = False
+    
+    def _link_monitor(self):
+        """Link-monitor thread for the threaded (no-selector) mode"""
         while self.running:
-            now = time.time()
-            delta = now - self.last_packet_time
-            if delta >= WARN_AFTER and not self._link_warned:
-                print("\n[LINK?] No packets from server for", f"{delta:.1f}s",
-                      "— UDP won't tell you you're disconnected. Waiting for traffic to resume...\n")
-                self._link_warned = True
-            if self._link_warned and delta < RESTORED_AFTER:
-                print("\n[LINK] Server contact restored (packets received).\n")
-                self._link_warned = False
-            time.sleep(0.5)
+            self._check_link()
+            time.sleep(LINK_CHECK_INTERVAL)
+    
+    def handle_command(self, user_input):
+        """Handle one line of user input; returns False when the user quits"""
+        user_input = user_input.strip().lower()
+        
+        if user_input == 'quit':
+            return False
+        elif user_input == 'start':
+            if self.registered:
+                self.send_packet(MSG_START)
+            else:
+                print("Not registered with server!")
+        elif user_input == 'status':
+            self.send_packet(MSG_STATUS)
+        elif user_input and user_input.upper() in ['A', 'B', 'C', 'D']:
+            if self.game_active:
+                self.submit_answer(user_input)
+            else:
+                print("No active game! Type 'start' to begin.")
+        elif user_input:
+            print("Invalid command or answer. Enter A, B, C, or D for answers.")
+        return True
     
     def start(self):
         """Start the client"""
         print(f"Connecting to server at {self.server_address[0]}:{self.server_address[1]}...")
         
         # Register with server
-        self.send_message('register', {'name': self.player_name})
+        self.send_packet(MSG_REGISTER, self.player_name.encode('utf-8'))
         
-        # Start receiver thread
-        receiver_thread = threading.Thread(target=self.receive_messages, daemon=True)
-        receiver_thread.start()
-        # Start link monitor thread
-        threading.Thread(target=self._link_monitor, daemon=True).start()
+        use_selector = stdin_selectable()
+        if use_selector:
+            # Single thread: one selector watches the socket (and stdin, once registered)
+            sel = selectors.DefaultSelector()
+            sel.register(self.sock, selectors.EVENT_READ, self._on_socket_readable)
+            # Wait for registration, returning as soon as the reply arrives
+            deadline = time.monotonic() + 0.5
+            while not self.registered and time.monotonic() < deadline:
+                for key, _ in sel.select(deadline - time.monotonic()):
+                    key.data()
+        else:
+            # Start receiver thread
+            self._wake_r, self._wake_w = socket.socketpair()
+            receiver_thread = threading.Thread(target=self.receive_messages, daemon=True)
+            receiver_thread.start()
+            # Start link monitor thread
+            threading.Thread(target=self._link_monitor, daemon=True).start()
+            
+            # Wait for registration
+            time.sleep(0.5)
         
-        # Wait for registration
-        time.sleep(0.5)
         if not self.registered:
             print("Failed to register with server. Make sure the server is running.")
             return
@@ -234,36 +370,29 @@ class UDPQuizClient:
         print("="*50 + "\n")
         
         try:
-            while self.running:
-                try:
-                    user_input = input().strip().lower()
-                    
-                    if user_input == 'quit':
+            if use_selector:
+                sel.register(sys.stdin, selectors.EVENT_READ, self._on_stdin_readable)
+                while self.running:
+                    for key, _ in sel.select(LINK_CHECK_INTERVAL):
+                        if not key.data():
+                            self.running = False
+                            break
+                    self._check_link()
+            else:
+                while self.running:
+                    try:
+                        user_input = input()
+                    except EOFError:
+                        break
+                    if not self.handle_command(user_input):
                         break
-                    elif user_input == 'start':
-                        if self.registered:
-                            self.send_message('start_game', {})
-                        else:
-                            print("Not registered with server!")
-                    elif user_input == 'status':
-                        self.send_message('get_status', {})
-                    elif user_input and user_input.upper() in ['A', 'B', 'C', 'D']:
-                        if self.game_active:
-                            self.submit_answer(user_input)
-                        else:
-                            print("No active game! Type 'start' to begin.")
-                    elif user_input:
-                        print("Invalid command or answer. Enter A, B, C, or D for answers.")
-                
-                except EOFError:
-                    break
-                except KeyboardInterrupt:
-                    break
         
         except KeyboardInterrupt:
             pass
         finally:
             self.running = False
+            if self._wake_w is not None:
+                self._wake_w.send(b'\0')  # wake the receiver thread so it sees running=False
             self.sock.close()
             print("\nDisconnected from server.")
 
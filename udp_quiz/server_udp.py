@@ -6,44 +6,196 @@ Demonstrates connectionless communication using UDP protocol
 
 import socket
 import json
-import threading
+import ctypes
+import ctypes.util
+import errno
+import heapq
+import select
+import struct
+import sys
 import time
+import itertools
+from bisect import bisect_left, insort
 from collections import defaultdict
 from datetime import datetime
 import random
 import os
 
+from udp_protocol import ANSWER_PACKET, MSG_ANSWER, MSG_REGISTER, MSG_START, MSG_STATUS, tune_socket_buffers
+
+try:
+    import orjson
+    _dumps = orjson.dumps  # returns UTF-8 bytes directly
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+# Batched I/O: Linux sendmmsg(2)/recvmmsg(2) move many datagrams per syscall.
+# Elsewhere (or if libc lacks them) these stay None and we loop sendto()/recvfrom().
+_sendmmsg = None
+_pack_sockaddr = None
+_RecvBatch = None
+if sys.platform.startswith('linux'):
+    class _IOVec(ctypes.Structure):
+        _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+    class _MsgHdr(ctypes.Structure):
+        _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                    ('msg_iov', ctypes.POINTER(_IOVec)), ('msg_iovlen', ctypes.c_size_t),
+                    ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                    ('msg_flags', ctypes.c_int)]
+
+    class _MMsgHdr(ctypes.Structure):
+        _fields_ = [('msg_hdr', _MsgHdr), ('msg_len', ctypes.c_uint)]
+
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    if hasattr(_libc, 'sendmmsg'):
+        _libc.sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+        _libc.sendmmsg.restype = ctypes.c_int
+
+        def _pack_sockaddr(address):
+            """Build the C sockaddr_in for an IPv4 (host, port) once, for reuse on every send"""
+            host, port = address
+            return ctypes.create_string_buffer(
+                struct.pack('=HH4s8x', socket.AF_INET, socket.htons(port), socket.inet_aton(host)), 16)
+
+        def _sendmmsg(fd, payloads, names):
+            """Send payloads[i] (a sequence of byte strings, gathered in order) to the packed
+            sockaddr names[i] in one syscall; return how many went out"""
+            count = len(payloads)
+            iovs = (_IOVec * sum(map(len, payloads)))()
+            msgs = (_MMsgHdr * count)()
+            j = 0
+            for i, (parts, name) in enumerate(zip(payloads, names)):
+                hdr = msgs[i].msg_hdr
+                hdr.msg_name = ctypes.cast(name, ctypes.c_void_p)
+                hdr.msg_namelen = ctypes.sizeof(name)
+                hdr.msg_iov = ctypes.pointer(iovs[j])
+                hdr.msg_iovlen = len(parts)
+                for part in parts:
+                    # c_char_p points at the bytes object's own buffer; nothing is copied
+                    iovs[j].iov_base = ctypes.cast(ctypes.c_char_p(part), ctypes.c_void_p)
+                    iovs[j].iov_len = len(part)
+                    j += 1
+            sent = 0
+            while sent < count:
+                n = _libc.sendmmsg(fd, ctypes.addressof(msgs[sent]), count - sent, 0)
+                if n <= 0:
+                    break  # e.g. EAGAIN; the caller finishes the rest with sendto()
+                sent += n
+            return sent
+
+    if hasattr(_libc, 'recvmmsg'):
+        _libc.recvmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+        _libc.recvmmsg.restype = ctypes.c_int
+        _SOCKADDR_IN_SIZE = 16
+
+        class _RecvBatch:
+            """Preallocated buffers for draining up to `count` datagrams per recvmmsg call"""
+            def __init__(self, count, size):
+                self.count = count
+                self.bufs = ((ctypes.c_char * size) * count)()
+                self.names = ((ctypes.c_char * _SOCKADDR_IN_SIZE) * count)()
+                self.iovs = (_IOVec * count)()
+                self.msgs = (_MMsgHdr * count)()
+                for i in range(count):
+                    self.iovs[i].iov_base = ctypes.addressof(self.bufs[i])
+                    self.iovs[i].iov_len = size
+                    hdr = self.msgs[i].msg_hdr
+                    hdr.msg_name = ctypes.addressof(self.names[i])
+                    hdr.msg_iov = ctypes.pointer(self.iovs[i])
+                    hdr.msg_iovlen = 1
+
+            def recv(self, fd):
+                """Return [(data, (host, port)), ...] for whatever is queued, without blocking"""
+                for i in range(self.count):
+                    self.msgs[i].msg_hdr.msg_namelen = _SOCKADDR_IN_SIZE  # the kernel overwrites it
+                n = _libc.recvmmsg(fd, ctypes.addressof(self.msgs), self.count, socket.MSG_DONTWAIT, None)
+                if n < 0:
+                    err = ctypes.get_errno()
+                    if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        return []
+                    raise OSError(err, os.strerror(err))
+                batch = []
+                for i in range(n):
+                    name = self.names[i].raw
+                    host = socket.inet_ntoa(name[4:8])
+                    port = struct.unpack_from('!H', name, 2)[0]
+                    batch.append((ctypes.string_at(self.bufs[i], self.msgs[i].msg_len), (host, port)))
+                return batch
+
 # Server configuration
 HOST = '0.0.0.0'  # Listen on all interfaces
 PORT = 8888
 BUFFER_SIZE = 4096
+HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')  # not available on Windows
+MAX_REQUEST_SIZE = 1024  # no legitimate client message comes close; larger datagrams are junk
+RECV_BATCH = 32  # max datagrams drained per recvmmsg call, so heartbeats are not starved
 QUESTION_TIME_LIMIT = 10  # seconds per question
-REBROADCAST_INTERVAL = float(os.getenv('UDP_REBROADCAST_EVERY', '2.0'))  # seconds
+# Points for a correct answer, indexed by whole seconds elapsed; 1 point after the table ends
+POINTS_BY_SECOND = tuple(max(1, (QUESTION_TIME_LIMIT - s - 1) // 5 + 1) for s in range(QUESTION_TIME_LIMIT))
+# Timer intervals are clamped: zero or negative values would make the timer heap spin
+MIN_TIMER_INTERVAL = 0.1  # seconds
+REBROADCAST_INTERVAL = max(MIN_TIMER_INTERVAL, float(os.getenv('UDP_REBROADCAST_EVERY', '2.0')))  # seconds
 # Heartbeat to illustrate connectionless nature (no state, periodic broadcast)
-HEARTBEAT_INTERVAL = float(os.getenv('UDP_HEARTBEAT_EVERY', '2.0'))
-
+HEARTBEAT_INTERVAL = max(MIN_TIMER_INTERVAL, float(os.getenv('UDP_HEARTBEAT_EVERY', '2.0')))
 class UDPQuizServer:
     def __init__(self):
         """Initialize UDP quiz server state and underlying socket."""
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        tune_socket_buffers(self.sock, RECV_BATCH * BUFFER_SIZE)  # one full receive batch
         self.sock.bind((HOST, PORT))
-        self.sock.settimeout(1.0)  # For graceful shutdown polling
+        # Non-blocking: run() sleeps in select() until a datagram or the next timer
+        # deadline, and Ctrl+C interrupts that wait directly, so no poll timeout is needed
+        self.sock.setblocking(False)
+        self._recv_batch = _RecvBatch(RECV_BATCH, BUFFER_SIZE) if _RecvBatch else None
+        # Single-datagram fallback reads into one persistent buffer
+        self._rxbuf = bytearray(BUFFER_SIZE)
+        self._rxmv = memoryview(self._rxbuf)
 
         # Load and shuffle questions
         self.questions = self.load_questions()
         random.shuffle(self.questions)
+        # Fixed for the server's lifetime, so serialized once; sends only append timestamp/seq
+        self._question_prefixes = self.encode_questions()
+        self._heartbeat_prefix = self._prefix('heartbeat', {'note': 'server heartbeat'})
 
         # Core game / client state
         self.clients = {}  # {address: {'name': str, 'score': int, 'answers': [], 'answer_times': []}}
+        self._client_addrs = []  # registered addresses in join order; broadcasts iterate this
+        self._client_sockaddrs = []  # packed sockaddr per entry of _client_addrs (sendmmsg only)
+        self._board = []  # sorted [(-score, join index into _client_addrs)]; the leaderboard order
         self.active_game = False
-        self.current_question_index = 0
-        self.question_start_time = None
-        self.game_lock = threading.Lock()
+        # (question index, monotonic start), always replaced together as one tuple.
+        # Everything (datagrams and timers) runs on the single run() loop, so game
+        # state needs no lock.
+        self.current_question = (0, None)
 
         # Sequencing + rebroadcast support (UDP demo features)
-        self.seq = 0  # monotonically increasing sequence number
-        self._last_rebroadcast = 0.0  # seconds since question start at last rebroadcast
-        self._last_heartbeat = 0.0
+        self._seq = itertools.count(1)  # monotonically increasing sequence number
+        # All timing (heartbeats, question rebroadcast/end, the pause between questions)
+        # runs on the main loop from one min-heap of (monotonic deadline, id, callback)
+        self._timers = []
+        self._timer_ids = itertools.count()  # tie-breaker so callbacks are never compared
+        self._schedule(0, self._heartbeat)
+        
+        # Inbound message type -> handler(address, data)
+        self._handlers = {
+            'register': self.handle_client_register,
+            'answer': self.handle_client_answer,
+            'start_game': self.handle_request_start_game,
+            'get_status': self.handle_get_status,
+        }
+        # Binary packet tag -> handler(address, payload bytes after the tag);
+        # answers skip this table on their own fast path in handle_datagram
+        self._packet_handlers = {
+            MSG_REGISTER: self.handle_register_packet,
+            MSG_START: lambda address, payload: self.handle_request_start_game(address, {}),
+            MSG_STATUS: lambda address, payload: self.handle_get_status(address, {}),
+        }
 
         print(f"UDP Quiz Server started on {HOST}:{PORT}")
         print(f"Loaded {len(self.questions)} questions")
@@ -87,206 +239,339 @@ class UDPQuizServer:
         return questions
     
     def _next_seq(self):
-        self.seq += 1
-        return self.seq
+        return next(self._seq)
 
-    def send_message(self, address, message_type, data):
-        """Send a message to a client with sequence number"""
-        message = {
-            'type': message_type,
-            'data': data,
-            'timestamp': time.time(),
-            'seq': self._next_seq()
-        }
+    def _prefix(self, message_type, data):
+        """Serialize type+data once; the closing brace is left off for the per-send fields"""
+        return _dumps({'type': message_type, 'data': data})[:-1]
+    
+    def encode_questions(self):
+        """Pre-serialize the 'question' message prefix for every question, in play order"""
+        total = len(self.questions)
+        return [
+            self._prefix('question', {
+                'question_number': i + 1,
+                'total_questions': total,
+                'question': question['question'],
+                'options': question['options'],
+                'time_limit': QUESTION_TIME_LIMIT
+            })
+            for i, question in enumerate(self.questions)
+        ]
+    
+    def _tail(self):
+        """The per-send end of a message: a fresh timestamp and sequence number"""
+        return f',"timestamp":{time.time()},"seq":{self._next_seq()}}}'.encode()
+    
+    def _sendto_parts(self, parts, address):
+        """Send (prefix, tail) as one datagram; sendmsg gathers them without joining"""
+        if HAS_SENDMSG:
+            self.sock.sendmsg(parts, (), 0, address)
+        else:
+            self.sock.sendto(b''.join(parts), address)
+    
+    def _send_prefixed(self, address, prefix):
+        """Finish a prebuilt prefix and send it to one client"""
         try:
-            payload = json.dumps(message).encode('utf-8')
-            self.sock.sendto(payload, address)
+            self._sendto_parts((prefix, self._tail()), address)
         except Exception as e:
             print(f"Error sending to {address}: {e}")
     
+    def send_message(self, address, message_type, data):
+        """Send a message to a client with sequence number"""
+        self._send_prefixed(address, self._prefix(message_type, data))
+    
+    def _send_batch(self, payloads, addresses, sockaddrs):
+        """Send payloads[i] (a (prefix, tail) pair) to addresses[i], in a single sendmmsg call where available"""
+        sent = 0
+        if _sendmmsg is not None and payloads:
+            sent = _sendmmsg(self.sock.fileno(), payloads, sockaddrs)
+        for payload, address in zip(payloads[sent:], addresses[sent:]):
+            try:
+                self._sendto_parts(payload, address)
+            except Exception as e:
+                print(f"Error sending to {address}: {e}")
+    
+    def _broadcast_prebuilt(self, prefix, exclude_address=None):
+        """Send one prebuilt message prefix to all clients"""
+        addresses = self._client_addrs
+        sockaddrs = self._client_sockaddrs
+        if exclude_address is not None:
+            kept = [i for i, address in enumerate(addresses) if address != exclude_address]
+            addresses = [addresses[i] for i in kept]
+            sockaddrs = [sockaddrs[i] for i in kept]
+        # Each datagram still gets its own timestamp/seq, in the same order as before;
+        # the shared prefix is gathered by the kernel rather than copied per recipient
+        payloads = [(prefix, self._tail()) for _ in addresses]
+        self._send_batch(payloads, addresses, sockaddrs)
+    
     def broadcast_message(self, message_type, data, exclude_address=None):
         """Broadcast message to all clients"""
-        for address in list(self.clients.keys()):
-            if address != exclude_address:
-                self.send_message(address, message_type, data)
+        # Encode once; each recipient only gets its own timestamp/seq appended
+        self._broadcast_prebuilt(self._prefix(message_type, data), exclude_address)
     
     def handle_client_register(self, address, data):
         """Handle client registration"""
-        with self.game_lock:
-            if self.active_game:
-                self.send_message(address, 'error', {'message': 'Game already in progress'})
-                return
-            
-            player_name = data.get('name', f'Player_{address[1]}')
-            self.clients[address] = {
-                'name': player_name,
-                'score': 0,
-                'answers': [],
-                'answer_times': []
-            }
-            print(f"Player {player_name} ({address}) registered")
-            self.send_message(address, 'registered', {
-                'message': f'Welcome {player_name}!',
-                'player_count': len(self.clients)
-            })
+        if self.active_game:
+            self.send_message(address, 'error', {'message': 'Game already in progress'})
+            return
+        
+        player_name = data.get('name', f'Player_{address[1]}')
+        previous = self.clients.get(address)
+        if previous is None:
+            order = len(self._client_addrs)
+            self._client_addrs.append(address)
+            self._client_sockaddrs.append(_pack_sockaddr(address) if _pack_sockaddr else None)
+            self._board.append((0, order))  # newest joiner sorts last among zero scores
+        else:
+            order = previous['order']
+            self._set_score(previous, 0)  # re-registering resets the score
+        self.clients[address] = {
+            'name': player_name,
+            'score': 0,
+            'answers': [],
+            'answer_times': [],
+            'order': order
+        }
+        print(f"Player {player_name} ({address}) registered")
+        self.send_message(address, 'registered', {
+            'message': f'Welcome {player_name}!',
+            'player_count': len(self.clients)
+        })
+    
+    def handle_register_packet(self, address, payload):
+        """Binary registration: the payload is the player name"""
+        name = payload.decode('utf-8', 'replace').strip()
+        self.handle_client_register(address, {'name': name} if name else {})
     
     def handle_client_answer(self, address, data):
         """Handle client answer submission"""
-        with self.game_lock:
-            if address not in self.clients:
-                return
-            
-            if not self.active_game or self.current_question_index >= len(self.questions):
-                return
-            
-            # Check if already answered this question
-            client = self.clients[address]
-            if len(client['answers']) > self.current_question_index:
-                return  # Already answered
-            
-            answer = data.get('answer', '').upper().strip()
-            question = self.questions[self.current_question_index]
-            correct_answer = question['answer'].strip()
-            
-            is_correct = (answer == correct_answer)
-            time_taken = time.time() - self.question_start_time
-            
-            client['answers'].append(answer)
-            client['answer_times'].append(time_taken)
-            
-            if is_correct:
-                # Points based on speed (30 seconds max)
-                points = max(1, int((QUESTION_TIME_LIMIT - time_taken) / 5) + 1)
-                client['score'] += points
-            else:
-                points = 0
-            
-            self.send_message(address, 'answer_result', {
-                'correct': is_correct,
-                'correct_answer': correct_answer,
-                'points': points,
-                'total_score': client['score'],
-                'time_taken': round(time_taken, 2)
-            })
+        self.record_answer(address, data.get('answer', '').upper().strip())
+    
+    def record_answer(self, address, answer):
+        """Score an answer letter for the current question and reply with the result"""
+        client = self.clients.get(address)
+        if client is None or not self.active_game:
+            return
+        
+        index, started = self.current_question
+        if started is None or index >= len(self.questions):
+            return
+        
+        # Check if already answered this question
+        if len(client['answers']) > index:
+            return  # Already answered
+        
+        correct_answer = self.questions[index]['answer'].strip()
+        
+        is_correct = (answer == correct_answer)
+        time_taken = time.monotonic() - started
+        
+        client['answers'].append(answer)
+        client['answer_times'].append(time_taken)
+        
+        if is_correct:
+            # Points based on speed
+            second = int(time_taken)
+            points = POINTS_BY_SECOND[second] if second < len(POINTS_BY_SECOND) else 1
+            self._set_score(client, client['score'] + points)
+        else:
+            points = 0
+        
+        self.send_message(address, 'answer_result', {
+            'correct': is_correct,
+            'correct_answer': correct_answer,
+            'points': points,
+            'total_score': client['score'],
+            'time_taken': round(time_taken, 2)
+        })
     
     def start_game(self):
         """Start the quiz game"""
-        with self.game_lock:
-            if len(self.clients) == 0:
-                print("No clients registered")
-                return
-            
-            if self.active_game:
-                return
-            
-            self.active_game = True
-            self.current_question_index = 0
-            
-            # Reset all client scores
-            for client in self.clients.values():
-                client['score'] = 0
-                client['answers'] = []
-                client['answer_times'] = []
-            
-            print(f"Game started with {len(self.clients)} players")
-            self.broadcast_message('game_start', {
-                'message': 'Game starting!',
-                'total_questions': len(self.questions)
-            })
-            
-            # Start sending questions
-            threading.Thread(target=self.game_loop, daemon=True).start()
+        if len(self.clients) == 0:
+            print("No clients registered")
+            return
+        
+        if self.active_game:
+            return
+        
+        self.active_game = True
+        self.current_question = (0, None)
+        
+        # Reset all client scores
+        for client in self.clients.values():
+            client['score'] = 0
+            client['answers'] = []
+            client['answer_times'] = []
+        self._board = [(0, order) for order in range(len(self._client_addrs))]
+        
+        print(f"Game started with {len(self.clients)} players")
+        self.broadcast_message('game_start', {
+            'message': 'Game starting!',
+            'total_questions': len(self.questions)
+        })
+        
+        # Start sending questions
+        self._schedule(0, lambda: self.ask_question(0))
     
-    def game_loop(self):
-        """Main game loop - send questions sequentially"""
-        for i, question in enumerate(self.questions):
-            if not self.active_game:
-                break
-            
-            with self.game_lock:
-                self.current_question_index = i
-                self.question_start_time = time.time()
-            
-            # Send question to all clients
-            question_data = {
-                'question_number': i + 1,
-                'total_questions': len(self.questions),
-                'question': question['question'],
-                'options': question['options'],
-                'time_limit': QUESTION_TIME_LIMIT
-            }
-            self.broadcast_message('question', question_data)
-            
-            # Active question window with periodic rebroadcast to mitigate loss/late joins
-            start = time.time()
-            self._last_rebroadcast = 0.0
-            while True:
-                elapsed = time.time() - start
-                if elapsed >= QUESTION_TIME_LIMIT:
-                    break
-                # Periodic rebroadcast
-                if elapsed - self._last_rebroadcast >= REBROADCAST_INTERVAL:
-                    print(f"[REBROADCAST] question {i+1}")
-                    self.broadcast_message('question', question_data)
-                    self._last_rebroadcast = elapsed
-                time.sleep(0.2)
-            
-            # Send correct answer if game still active
-            with self.game_lock:
-                if self.active_game:
-                    self.broadcast_message('question_end', {
-                        'correct_answer': question['answer'],
-                        'question_number': i + 1
-                    })
-            
-            # Brief pause between questions
-            if i < len(self.questions) - 1:
-                time.sleep(2)
+    def _schedule(self, delay, callback):
+        """Run callback on the main loop after delay seconds"""
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_ids), callback))
+    
+    def _run_due_timers(self):
+        """Run every timer whose deadline has passed; return seconds until the next one"""
+        timers = self._timers
+        while timers and timers[0][0] <= time.monotonic():
+            _, _, callback = heapq.heappop(timers)
+            try:
+                callback()
+            except Exception as e:
+                print(f"Timer error: {e}")
+        return max(0.0, timers[0][0] - time.monotonic()) if timers else None
+    
+    def _heartbeat(self):
+        """Periodic heartbeat broadcast (even if no incoming data)"""
+        if self.clients:
+            self._broadcast_prebuilt(self._heartbeat_prefix)
+        self._schedule(HEARTBEAT_INTERVAL, self._heartbeat)
+    
+    def ask_question(self, i):
+        """Send question i and schedule its rebroadcasts and end"""
+        if not self.active_game or i >= len(self.questions):
+            # Game ended - send final leaderboard
+            self.end_game()
+            return
+        
+        self.current_question = (i, time.monotonic())
         
-        # Game ended - send final leaderboard
-        self.end_game()
+        # Send question to all clients; the same prefix serves every rebroadcast
+        self._broadcast_prebuilt(self._question_prefixes[i])
+        
+        # Active question window with periodic rebroadcast to mitigate loss/late joins
+        rebroadcast_at = REBROADCAST_INTERVAL
+        while rebroadcast_at < QUESTION_TIME_LIMIT:
+            self._schedule(rebroadcast_at, lambda: self._rebroadcast_question(i))
+            rebroadcast_at += REBROADCAST_INTERVAL
+        self._schedule(QUESTION_TIME_LIMIT, lambda: self.end_question(i))
+    
+    def _rebroadcast_question(self, i):
+        if self.active_game:
+            print(f"[REBROADCAST] question {i+1}")
+            self._broadcast_prebuilt(self._question_prefixes[i])
+    
+    def end_question(self, i):
+        """Reveal the answer to question i, then move on after a brief pause"""
+        # Send correct answer if game still active
+        if self.active_game:
+            self.broadcast_message('question_end', {
+                'correct_answer': self.questions[i]['answer'],
+                'question_number': i + 1
+            })
+        
+        # Brief pause between questions
+        if i < len(self.questions) - 1:
+            self._schedule(2, lambda: self.ask_question(i + 1))
+        else:
+            self.ask_question(i + 1)
+    
+    def _set_score(self, client, score):
+        """Update a client's score and move it within _board"""
+        board = self._board
+        del board[bisect_left(board, (-client['score'], client['order']))]
+        client['score'] = score
+        insort(board, (-score, client['order']))
     
     def end_game(self):
         """End the game and send final leaderboard"""
-        with self.game_lock:
-            self.active_game = False
-            
-            # Calculate leaderboard
-            leaderboard = []
-            for address, client in self.clients.items():
-                leaderboard.append({
-                    'name': client['name'],
-                    'score': client['score'],
-                    'address': f"{address[0]}:{address[1]}"
-                })
-            
-            leaderboard.sort(key=lambda x: x['score'], reverse=True)
-            
-            print("\n=== Final Leaderboard ===")
-            for i, entry in enumerate(leaderboard, 1):
-                print(f"{i}. {entry['name']}: {entry['score']} points")
-            print("========================\n")
-            
-            self.broadcast_message('game_end', {
-                'leaderboard': leaderboard,
-                'message': 'Game finished!'
+        self.active_game = False
+        
+        # _board is already in leaderboard order (ties keep join order)
+        leaderboard = []
+        for neg_score, order in self._board:
+            address = self._client_addrs[order]
+            leaderboard.append({
+                'name': self.clients[address]['name'],
+                'score': -neg_score,
+                'address': f"{address[0]}:{address[1]}"
             })
-            
-            # Reset for next game
-            self.current_question_index = 0
+        
+        print("\n=== Final Leaderboard ===")
+        for i, entry in enumerate(leaderboard, 1):
+            print(f"{i}. {entry['name']}: {entry['score']} points")
+        print("========================\n")
+        
+        self.broadcast_message('game_end', {
+            'leaderboard': leaderboard,
+            'message': 'Game finished!'
+        })
+        
+        # Reset for next game
+        self.current_question = (0, None)
+    
+    def handle_get_status(self, address, data):
+        """Report game status to a client"""
+        self.send_message(address, 'status', {
+            'active_game': self.active_game,
+            'player_count': len(self.clients),
+            'current_question': self.current_question[0]
+        })
     
-    def handle_request_start_game(self, address):
+    def handle_request_start_game(self, address, data):
         """Handle request to start game"""
-        with self.game_lock:
-            if address not in self.clients:
-                self.send_message(address, 'error', {'message': 'Not registered'})
-                return
-            
-            # Start game if not already active
-            if not self.active_game and len(self.clients) > 0:
-                threading.Thread(target=self.start_game, daemon=True).start()
+        if address not in self.clients:
+            self.send_message(address, 'error', {'message': 'Not registered'})
+            return
+        
+        # Start game if not already active
+        if not self.active_game and len(self.clients) > 0:
+            self.start_game()
+        else:
+            self.send_message(address, 'error', {'message': 'Cannot start game now'})
+    
+    def handle_datagram(self, data, address):
+        """Dispatch one datagram: binary packets by their tag byte, JSON by message type"""
+        if len(data) == ANSWER_PACKET.size and data[0] == MSG_ANSWER:
+            self.record_answer(address, chr(data[1]).upper())
+            return
+        # Cheap header peek: drop oversized or empty datagrams without parsing or replying
+        if not data or len(data) > MAX_REQUEST_SIZE:
+            return
+        try:
+            if data[0] != 0x7B:  # not '{': a tagged binary packet
+                handler = self._packet_handlers.get(data[0])
+                if handler:
+                    handler(address, data[1:])
+                return  # unknown tags are junk; no reply
+            message = _loads(data)
+            handler = self._handlers.get(message.get('type'))
+            if handler:
+                handler(address, message.get('data', {}))
             else:
-                self.send_message(address, 'error', {'message': 'Cannot start game now'})
+                self.send_message(address, 'error', {'message': 'Unknown message type'})
+        
+        except json.JSONDecodeError:  # also raised by orjson
+            self.send_message(address, 'error', {'message': 'Invalid JSON'})
+        except Exception as e:
+            print(f"Error handling message from {address}: {e}")
+            self.send_message(address, 'error', {'message': str(e)})
+    
+    def receive_batch(self, timeout):
+        """Wait up to timeout seconds, then return every queued (data, address) pair"""
+        ready, _, _ = select.select([self.sock], [], [], timeout)
+        if not ready:
+            return []
+        if self._recv_batch is not None:
+            try:
+                return self._recv_batch.recv(self.sock.fileno())
+            except OSError as e:
+                if e.errno != errno.ENOSYS:
+                    raise
+                self._recv_batch = None  # kernel without recvmmsg: use recvfrom from now on
+        try:
+            n, address = self.sock.recvfrom_into(self._rxbuf)
+        except BlockingIOError:
+            return []
+        return [(bytes(self._rxmv[:n]), address)]
     
     def run(self):
         """Main server loop"""
@@ -295,42 +580,11 @@ class UDPQuizServer:
         
         try:
             while True:
-                # Periodic heartbeat broadcast (even if no incoming data)
-                now = time.time()
-                if now - self._last_heartbeat >= HEARTBEAT_INTERVAL and self.clients:
-                    self.broadcast_message('heartbeat', {'note': 'server heartbeat'})
-                    self._last_heartbeat = now
+                # Sleep until the next datagram or the next timer deadline
+                timeout = self._run_due_timers()
                 try:
-                    data, address = self.sock.recvfrom(BUFFER_SIZE)
-                    
-                    try:
-                        message = json.loads(data.decode('utf-8'))
-                        msg_type = message.get('type')
-                        msg_data = message.get('data', {})
-                        
-                        if msg_type == 'register':
-                            self.handle_client_register(address, msg_data)
-                        elif msg_type == 'answer':
-                            self.handle_client_answer(address, msg_data)
-                        elif msg_type == 'start_game':
-                            self.handle_request_start_game(address)
-                        elif msg_type == 'get_status':
-                            self.send_message(address, 'status', {
-                                'active_game': self.active_game,
-                                'player_count': len(self.clients),
-                                'current_question': self.current_question_index
-                            })
-                        else:
-                            self.send_message(address, 'error', {'message': 'Unknown message type'})
-                    
-                    except json.JSONDecodeError:
-                        self.send_message(address, 'error', {'message': 'Invalid JSON'})
-                    except Exception as e:
-                        print(f"Error handling message from {address}: {e}")
-                        self.send_message(address, 'error', {'message': str(e)})
-                
-                except socket.timeout:
-                    continue
+                    for data, address in self.receive_batch(timeout):
+                        self.handle_datagram(data, address)
                 except Exception as e:
                     print(f"Server error: {e}")
                     break
@@ -343,4 +597,3 @@ class UDPQuizServer:
 if __name__ == '__main__':
     server = UDPQuizServer()
     server.run()
-
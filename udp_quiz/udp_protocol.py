@@ -0,0 +1,47 @@
+"""
+UDP Quiz wire protocol and socket setup
+Shared by server_udp.py and client_udp.py so both ends always agree on the format
+"""
+
+import socket
+import struct
+import sys
+
+# Binary client->server packets: one tag byte, then the payload. Tag bytes can never
+# begin a JSON datagram ('{' is 0x7B), which the server still accepts as a fallback.
+MSG_REGISTER = 0x01  # payload: player name, UTF-8
+MSG_ANSWER = 0x02  # payload: answer letter
+MSG_START = 0x03  # no payload
+MSG_STATUS = 0x04  # no payload
+ANSWER_PACKET = struct.Struct('!Bc')  # tag, answer letter
+
+SOCKET_BUFFER_BYTES = 12 * 1024 * 1024  # requested SO_RCVBUF/SO_SNDBUF size
+_buffer_warned = False  # the low-buffer warning is printed once per process
+
+def _buffer_limit_hint():
+    """How to raise the kernel's socket buffer cap on this platform"""
+    if sys.platform.startswith('linux'):
+        return f"raise it with: sysctl -w net.core.rmem_max={SOCKET_BUFFER_BYTES}"
+    if sys.platform == 'darwin':
+        return f"raise it with: sysctl -w kern.ipc.maxsockbuf={2 * SOCKET_BUFFER_BYTES}"
+    return "raise the OS socket buffer limit"
+
+def tune_socket_buffers(sock, needed):
+    """Ask for large UDP buffers so bursts aren't dropped in the kernel queue.
+    Warns (once) if the receive buffer granted is below `needed` bytes."""
+    global _buffer_warned
+    for opt in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+        # Linux silently caps the request; macOS rejects sizes over its limit,
+        # so step down until one is accepted
+        size = SOCKET_BUFFER_BYTES
+        while size >= needed:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, opt, size)
+                break
+            except OSError:
+                size //= 2
+    actual = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    if actual < needed and not _buffer_warned:
+        _buffer_warned = True
+        print(f"[WARN] UDP receive buffer is {actual // 1024} KB, below the {needed // 1024} KB "
+              f"needed to absorb bursts; {_buffer_limit_hint()}")